@@ -4,20 +4,26 @@ Initialize the Flask application and configure extensions.
 This module sets up the Flask app instance, configures it based on the environment,
 initializes database and migration tools, enables CORS, and registers all blueprints.
 
+Web workers only pay for what serves requests: Flask-Migrate (and with it
+Alembic) is imported only when the app is loaded by the `flask` CLI, and
+Flask-Mail is initialised by the outbox worker on first delivery.
+
 """
 
 import os
+import click
+from dotenv import load_dotenv
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_cors import CORS
-from .config import DevelopmentConfig, ProductionConfig, TestingConfig
+from .utils.cache import TTLCache
+from .utils.replicas import RoutingSession, replicas
 
 # Initialize Flask extensions at the module level
-db = SQLAlchemy()
-migrate = Migrate()
-mail = Mail()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Routes read-only requests to replicas
+mail = Mail()  # Initialised lazily, see app/utils/outbox.py
+api_key_cache = TTLCache(size_key='API_KEY_CACHE_SIZE', ttl_key='API_KEY_CACHE_TTL')
 
 
 def create_app(config_class='app.config.Config'):
@@ -32,6 +38,11 @@ def create_app(config_class='app.config.Config'):
     """
     app = Flask(__name__)
 
+    # Load environment variables from a .env file if present, before the
+    # config classes read them
+    load_dotenv()
+    from .config import DevelopmentConfig, ProductionConfig, TestingConfig
+
     # Determine environment and apply the corresponding configuration
     app_config = os.getenv('FLASK_ENV', 'development')  
     if app_config == 'production':
@@ -41,19 +52,67 @@ def create_app(config_class='app.config.Config'):
     else:
         app.config.from_object(DevelopmentConfig)
 
-    # Initialize Flask extensions
+    from .utils.json_provider import FastJSONProvider
+
+    app.json = FastJSONProvider(app)
+
+    if not app.config['SECRET_KEY']:
+        # Tokens signed with a per-process key would fail on every other worker
+        app.logger.warning("SECRET_KEY is not set; using a random key and disabling access tokens")
+        app.config['SECRET_KEY'] = os.urandom(24)
+        app.config['ACCESS_TOKENS_ENABLED'] = False
+
+    # Initialize Flask extensions; replica binds must be registered first
+    replicas.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
-    mail.init_app(app)
-    CORS(app)  # Allow cross-origin requests for all API routes
+    if click.get_current_context(silent=True) is not None:
+        # Loaded by the flask CLI (e.g. `flask db upgrade` in the release
+        # phase): only then is the migration machinery needed
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+    api_key_cache.init_app(app)
+
+    from .utils.tokens import revocation_list
+
+    revocation_list.init_app(app)
+
+    from .utils.outbox import outbox_worker
+
+    outbox_worker.init_app(app)
+
+    from .utils.metrics import metrics
+
+    metrics.init_app(app)
+
+    # Registered after metrics so its after_request hook runs first and the
+    # metrics record the bytes actually sent
+    from .utils.compression import compression
+
+    compression.init_app(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'X-Next-Offset', 'Server-Timing'])  # Allow cross-origin requests for all API routes
 
     # Import and register blueprints
-    from .routes import auth_bp, clients_bp, programs_bp, enroll_bp, admin_bp
+    from .routes import auth_bp, clients_bp, programs_bp, enroll_bp, admin_bp, sync_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(clients_bp, url_prefix='/api/clients')
     app.register_blueprint(programs_bp, url_prefix='/api/programs')
     app.register_blueprint(enroll_bp, url_prefix='/api/enrollments')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+
+    # Register CLI commands
+    from .commands import (
+        export_command, find_duplicates_command, import_clients_command, prune_tombstones_command,
+        rebuild_program_stats_command, send_outbox_command,
+    )
+
+    app.cli.add_command(import_clients_command)
+    app.cli.add_command(send_outbox_command)
+    app.cli.add_command(rebuild_program_stats_command)
+    app.cli.add_command(prune_tombstones_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(find_duplicates_command)
 
     return app
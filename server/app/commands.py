@@ -0,0 +1,163 @@
+"""
+Flask CLI commands.
+
+These are registered on the app in `create_app` and run with the flask
+command, e.g. `flask --app run import-clients clients.csv --doctor-id 1`.
+"""
+
+import json
+import os
+import sys
+import time
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Doctor, ProgramEnrollmentCount, Tombstone
+from app.utils.client_import import import_clients, iter_records
+from app.utils.dedup import find_duplicate_clusters
+from app.utils.export import DATASETS, FORMATS, available_formats, export, last_exported_id
+from app.utils.outbox import outbox_worker
+
+
+@click.command('import-clients')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--doctor-id', type=int, required=True,
+              help='ID of the doctor recorded as creator of the imported clients.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='File format; inferred from the extension when omitted.')
+@click.option('--batch-size', type=int,
+              help='Rows per INSERT/COPY batch (defaults to IMPORT_BATCH_SIZE).')
+@with_appcontext
+def import_clients_command(path, doctor_id, fmt, batch_size):
+    """
+    Bulk-register clients from a CSV (with header row) or NDJSON file.
+    """
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+
+    if db.session.get(Doctor, doctor_id) is None:
+        raise click.BadParameter(f"No doctor with id {doctor_id}", param_hint='--doctor-id')
+
+    with open(path, encoding='utf-8', newline='') as stream:
+        summary = import_clients(iter_records(stream, fmt), doctor_id, batch_size)
+
+    for error in summary['errors']:
+        click.echo(f"row {error['row']}: {error['msg']}", err=True)
+    click.echo(f"Imported {summary['imported']} clients, {summary['failed']} failed.")
+
+
+@click.command('export')
+@click.argument('dataset', type=click.Choice(list(DATASETS)))
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), default='csv', show_default=True,
+              help='Output format; parquet requires pyarrow.')
+@click.option('--output', type=click.Path(dir_okay=False),
+              help="File to write (defaults to <dataset>.<format>; '-' for stdout).")
+@click.option('--after', type=int, help='Only export rows with a greater id.')
+@click.option('--resume', is_flag=True,
+              help='Continue an interrupted CSV/NDJSON export after the last complete row of --output.')
+@click.option('--batch-size', type=int,
+              help='Rows per server-side cursor fetch (defaults to EXPORT_BATCH_SIZE).')
+@with_appcontext
+def export_command(dataset, fmt, output, after, resume, batch_size):
+    """
+    Export every client, program or enrollment, streaming from a server-side cursor.
+    """
+    if fmt not in available_formats():
+        raise click.BadParameter("Parquet export requires the pyarrow package", param_hint='--format')
+    output = output or f"{dataset}.{FORMATS[fmt][1]}"
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+
+    mode = 'wb'
+    if resume:
+        if fmt == 'parquet' or output == '-':
+            raise click.UsageError("--resume appends to a CSV or NDJSON --output file; "
+                                   "for Parquet, write a new file with --after")
+        if os.path.exists(output):
+            after = last_exported_id(output, fmt)
+            mode = 'ab'
+            click.echo(f"Resuming after id {after}." if after is not None else "Restarting.", err=True)
+
+    header = mode == 'wb' or os.path.getsize(output) == 0
+    chunks = export(dataset, fmt, after=after, batch_size=batch_size,
+                    dumps=current_app.json.dumps_bytes, header=header)
+    if output == '-':
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return
+
+    with open(output, mode) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    click.echo(f"Exported {dataset} to {output}.", err=True)
+
+
+@click.command('send-outbox')
+@click.option('--loop', is_flag=True,
+              help='Keep polling for new messages instead of exiting once drained.')
+@with_appcontext
+def send_outbox_command(loop):
+    """
+    Deliver queued emails from the outbox.
+    """
+    while True:
+        sent = outbox_worker.drain()
+        db.session.remove()
+        if not loop:
+            click.echo(f"Processed {sent} outbox messages.")
+            return
+        time.sleep(current_app.config['MAIL_OUTBOX_POLL_INTERVAL'])
+
+
+@click.command('rebuild-program-stats')
+@with_appcontext
+def rebuild_program_stats_command():
+    """
+    Recompute the per-program enrollment counters from the enrollments table.
+    """
+    ProgramEnrollmentCount.rebuild()
+    db.session.commit()
+    click.echo("Program enrollment counters rebuilt.")
+
+
+@click.command('prune-tombstones')
+@with_appcontext
+def prune_tombstones_command():
+    """
+    Delete deletion records older than SYNC_TOKEN_MAX_AGE_DAYS.
+
+    Sync tokens older than that are rejected, so no caller still needs them.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOKEN_MAX_AGE_DAYS'])
+    deleted = db.session.execute(
+        db.delete(Tombstone).where(Tombstone.deleted_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    click.echo(f"Pruned {deleted} tombstones.")
+
+
+@click.command('find-duplicates')
+@click.option('--threshold', type=float,
+              help='Minimum pair score, 0-1 (defaults to DEDUP_THRESHOLD).')
+@click.option('--output', type=click.File('w'), default='-',
+              help='NDJSON report file, one cluster per line (defaults to stdout).')
+@with_appcontext
+def find_duplicates_command(threshold, output):
+    """
+    Report clusters of clients that are likely the same patient.
+    """
+    config = current_app.config
+    threshold = config['DEDUP_THRESHOLD'] if threshold is None else threshold
+    clusters, compared = find_duplicate_clusters(
+        threshold=threshold, block_size=config['DEDUP_BLOCK_SIZE'],
+        batch_size=config['EXPORT_BATCH_SIZE'],
+    )
+    for cluster in clusters:
+        output.write(json.dumps(cluster) + "\n")
+    click.echo(
+        f"Found {len(clusters)} clusters covering {sum(len(c['client_ids']) for c in clusters)} "
+        f"clients ({compared} candidate pairs scored).", err=True,
+    )
@@ -2,11 +2,15 @@
 Database models for the Health Information System.
 
 This module defines the Doctor, APIKey, Client, HealthProgram, and Enrollment models,
-along with their relationships.
+along with their relationships, the per-program enrollment counters, the
+CacheGeneration counters used to detect stale in-process caches across
+workers, and the EmailOutbox of queued emails.
 """
 
 from datetime import datetime
 from . import db
+from .utils.bulk import insert_or_add, supports_insert_ignore
+from .utils.phonetic import first_name_code, last_name_code, soundex
 
 
 # db = SQLAlchemy()  # Already initialized in __init__.py; no need to redefine here
@@ -37,10 +41,19 @@ class APIKey(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(64), unique=True, nullable=False, index=True)
-    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
 
+    __table_args__ = (
+        # Covers the auth lookup, which only ever matches active keys
+        db.Index(
+            'ix_api_keys_key_is_active', 'key', 'is_active',
+            postgresql_where=db.text('is_active'),
+            sqlite_where=db.text('is_active'),
+        ),
+    )
+
     # Relationships
     doctor = db.relationship('Doctor', back_populates='api_keys')
 
@@ -57,11 +70,25 @@ class Client(db.Model):
     date_of_birth = db.Column(db.Date, nullable=True)
     gender = db.Column(db.String(10), nullable=True)
     contact_info = db.Column(db.Text, nullable=True)
-    registered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    registered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    created_by_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    # Soundex codes of the names: duplicate-detection blocking keys
+    first_name_code = db.Column(db.String(4), default=first_name_code, nullable=False)
+    last_name_code = db.Column(db.String(4), default=last_name_code, nullable=False)
+
+    created_by_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False, index=True)
     created_by = db.relationship('Doctor', back_populates='clients')
 
+    __table_args__ = (
+        # Delta sync pages through changes by (updated_at, id)
+        db.Index('ix_clients_updated_at', 'updated_at', 'id'),
+        # Duplicate-detection blocks (app.utils.dedup)
+        db.Index('ix_clients_dedup_last_dob', 'last_name_code', 'date_of_birth'),
+        db.Index('ix_clients_dedup_first_dob', 'first_name_code', 'date_of_birth'),
+        db.Index('ix_clients_dedup_names', 'first_name_code', 'last_name_code'),
+    )
+
     # Relationships
     enrollments = db.relationship('Enrollment', back_populates='client', cascade='all, delete-orphan', overlaps='programs,clients')
     programs = db.relationship(
@@ -72,6 +99,13 @@ class Client(db.Model):
     )
 
 
+@db.event.listens_for(Client, 'before_update')
+def _update_name_codes(mapper, connection, target):
+    # Inserts get the codes from the column defaults
+    target.first_name_code = soundex(target.first_name)
+    target.last_name_code = soundex(target.last_name)
+
+
 class HealthProgram(db.Model):
     """
     Represents a health program or service like TB, Malaria, HIV, etc.
@@ -82,10 +116,15 @@ class HealthProgram(db.Model):
     name = db.Column(db.String(120), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    created_by_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False, index=True)
     created_by = db.relationship('Doctor', back_populates='programs')
 
+    __table_args__ = (
+        db.Index('ix_health_programs_updated_at', 'updated_at', 'id'),
+    )
+
     # Relationships
     enrollments = db.relationship('Enrollment', back_populates='program', cascade='all, delete-orphan', overlaps='clients,programs')
     clients = db.relationship(
@@ -96,18 +135,196 @@ class HealthProgram(db.Model):
     )
 
 
+# Statuses an enrollment can move between; new enrollments start 'active'
+ENROLLMENT_STATUSES = ('active', 'completed', 'dropped')
+
+
 class Enrollment(db.Model):
     """
     Represents a client's enrollment into a specific health program.
     """
     __tablename__ = 'enrollments'
+    __table_args__ = (
+        # A client can only be enrolled once per program; its leading
+        # client_id column also serves lookups by client
+        db.UniqueConstraint('client_id', 'program_id', name='uq_enrollments_client_program'),
+        # Keyset pages of a program's enrollments, optionally by status; the
+        # first also serves plain lookups by program_id
+        db.Index('ix_enrollments_program_enrolled_at', 'program_id', 'enrolled_at', 'id'),
+        db.Index('ix_enrollments_program_status_enrolled_at', 'program_id', 'status', 'enrolled_at', 'id'),
+        db.Index('ix_enrollments_updated_at', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
     program_id = db.Column(db.Integer, db.ForeignKey('health_programs.id'), nullable=False)
-    enrolled_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    enrolled_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     status = db.Column(db.String(50), default='active')  # Status examples: active, completed, dropped
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
     client = db.relationship('Client', back_populates='enrollments', overlaps='programs,clients')
     program = db.relationship('HealthProgram', back_populates='enrollments', overlaps='clients,programs')
+
+
+class ProgramEnrollmentCount(db.Model):
+    """
+    Number of enrollments per program and status, kept up to date by every
+    write to `enrollments` so statistics never have to scan that table.
+    Recompute it from scratch with `flask rebuild-program-stats`.
+    """
+    __tablename__ = 'program_enrollment_counts'
+
+    program_id = db.Column(db.Integer, db.ForeignKey('health_programs.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    @classmethod
+    def add(cls, deltas):
+        """
+        Apply count changes in the current transaction.
+
+        Args:
+            deltas (dict): (program_id, status) -> change in count; zero
+                changes are ignored.
+        """
+        rows = [
+            {"program_id": program_id, "status": status, "count": delta}
+            for (program_id, status), delta in sorted(deltas.items()) if delta
+        ]
+        if not rows:
+            return
+        if supports_insert_ignore():
+            db.session.execute(insert_or_add(cls, ['program_id', 'status'], 'count'), rows)
+            return
+        for row in rows:
+            updated = db.session.execute(
+                db.update(cls)
+                .where(cls.program_id == row["program_id"], cls.status == row["status"])
+                .values(count=cls.count + row["count"])
+            ).rowcount
+            if not updated:
+                db.session.add(cls(**row))
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Replace every counter with a single GROUP BY over `enrollments`,
+        in the current transaction.
+        """
+        status = db.func.coalesce(Enrollment.status, 'active')
+        db.session.execute(db.delete(cls))
+        db.session.execute(
+            db.insert(cls).from_select(
+                ['program_id', 'status', 'count'],
+                db.select(Enrollment.program_id, status, db.func.count())
+                .group_by(Enrollment.program_id, status)
+            )
+        )
+
+
+class Tombstone(db.Model):
+    """
+    Records the deletion of a client, program or enrollment so delta sync
+    can tell offline frontends to drop their copy.
+    """
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_deleted_at', 'deleted_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # clients, programs or enrollments
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Entities whose ORM deletes leave a tombstone, by sync payload name
+TOMBSTONED_MODELS = {'clients': Client, 'programs': HealthProgram, 'enrollments': Enrollment}
+
+
+def _record_tombstone(entity):
+    def after_delete(mapper, connection, target):
+        connection.execute(Tombstone.__table__.insert().values(
+            entity=entity, entity_id=target.id, deleted_at=datetime.utcnow()
+        ))
+    return after_delete
+
+
+for _entity, _model in TOMBSTONED_MODELS.items():
+    db.event.listen(_model, 'after_delete', _record_tombstone(_entity))
+
+
+class CacheGeneration(db.Model):
+    """
+    A named counter bumped whenever the data behind an in-process cache changes,
+    so every worker can cheaply tell whether its cached copy is stale.
+    """
+    __tablename__ = 'cache_generations'
+
+    name = db.Column(db.String(64), primary_key=True)
+    generation = db.Column(db.Integer, default=0, nullable=False)
+
+    @classmethod
+    def current(cls, name):
+        """
+        Return the current generation for `name` (0 if it was never bumped).
+        """
+        value = db.session.execute(
+            db.select(cls.generation).where(cls.name == name)
+        ).scalar()
+        return value or 0
+
+    @classmethod
+    def bump(cls, name):
+        """
+        Increment the generation for `name` in the current transaction.
+
+        Uses an atomic upsert where supported, so concurrent first bumps of
+        a name cannot both insert it.
+        """
+        if supports_insert_ignore():
+            db.session.execute(insert_or_add(cls, ['name'], 'generation'), {"name": name, "generation": 1})
+            return
+        updated = db.session.execute(
+            db.update(cls).where(cls.name == name).values(generation=cls.generation + 1)
+        ).rowcount
+        if not updated:
+            db.session.add(cls(name=name, generation=1))
+
+
+class RevokedToken(db.Model):
+    """
+    An access token (by its jti) or all tokens issued for one API key (by the
+    key's id) that must be rejected until `expires_at`, when they would have
+    expired anyway.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    token_id = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class EmailOutbox(db.Model):
+    """
+    An email queued for background delivery.
+
+    Rows are written in the same transaction as the change that triggers the
+    email and delivered later by the outbox worker (see app/utils/outbox.py).
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # The worker polls for due, pending messages
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # Comma-separated addresses
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
@@ -2,7 +2,7 @@
 Initialize and expose all route blueprints.
 
 This file imports the individual blueprints from the route modules
-(clients, programs, enrollments, authentication, and admin) and makes them available
+(clients, programs, enrollments, authentication, admin, and sync) and makes them available
 for registration in the application factory.
 """
 
@@ -11,3 +11,4 @@ from .programs import programs_bp
 from .enrollments import enroll_bp
 from .auth import auth_bp
 from .admin import admin_bp
+from .sync import sync_bp
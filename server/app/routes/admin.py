@@ -1,22 +1,84 @@
 """
 Admin routes for managing doctors and provisioning API keys.
 
-This module allows a super admin to create a new doctor,
-generate an API key for them, and send it via email.
+This module allows a super admin to create a new doctor (or many at once),
+generate an API key for them, and send it via email, to inspect
+the worker's database connection pool, and to export the registry.
 
 """
 
-from flask import Blueprint, request, jsonify
-from flask_mail import Message
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy import select
 import secrets
 
-from app import db, mail
+from app import db
 from app.models import Doctor, APIKey
-from app.utils.auth import super_admin_required
+from app.utils.auth import super_admin_required, invalidate_api_keys
+from app.utils.bulk import insert_ignore, supports_insert_ignore
+from app.utils.db_pool import pool_stats
+from app.utils.export import DATASETS, FORMATS, available_formats, export
+from app.utils.outbox import outbox_worker, queue_email, queue_emails
+from app.utils.replicas import read_only
+from app.utils.tokens import revoke_api_key_tokens
 
 # Create a Blueprint for admin-related routes
 admin_bp = Blueprint('admin', __name__)
 
+# Maximum number of doctors accepted by one bulk provisioning request
+MAX_BULK_DOCTORS = 1000
+
+API_KEY_EMAIL_SUBJECT = "Your CEMA Health System API Key"
+
+
+def valid_email(email):
+    """
+    Return True if `email` looks like a single address that is safe to use
+    as a mail header: contains '@' and no line breaks.
+    """
+    return (
+        isinstance(email, str) and '@' in email
+        and '\r' not in email and '\n' not in email
+    )
+
+
+def parse_doctor_entry(entry):
+    """
+    Validate a doctor to provision (a request body, or one bulk entry).
+
+    Returns:
+        dict: The doctors row to insert (name, email, is_admin).
+
+    Raises:
+        ValueError: If the entry is malformed; the message says why.
+    """
+    if not isinstance(entry, dict) or not (entry.get('name') and entry.get('email')):
+        raise ValueError("Both name and email are required")
+    name, email = entry['name'], entry['email']
+    for field, value, length in (('name', name, 120), ('email', email, 255)):
+        if not isinstance(value, str) or len(value) > length:
+            raise ValueError(f"{field} must be a string of at most {length} characters")
+    if not valid_email(email):
+        raise ValueError("Invalid email address")
+    is_admin = entry.get('is_admin')
+    if is_admin is None:
+        is_admin = False
+    elif not isinstance(is_admin, bool):
+        raise ValueError("is_admin must be true or false")
+    return {"name": name, "email": email, "is_admin": is_admin}
+
+
+def api_key_email_body(name, key):
+    """
+    Build the body of the email that hands a doctor their API key.
+    """
+    return (
+        f"Hello {name},\n\n"
+        f"Welcome to CEMA Health System!\n\n"
+        f"Your API key is:\n\n    {key}\n\n"
+        "Please keep it secret, and use it as API-KEY in your requests."
+    )
+
 
 @admin_bp.route('/doctors', methods=['POST'])
 @super_admin_required
@@ -29,7 +91,7 @@ def create_and_provision_doctor():
         1. Create a Doctor record.
         2. Revoke any of the doctor's previous API keys (if any).
         3. Generate a new API key and store it.
-        4. Send the API key to the doctor's email.
+        4. Queue the API key email for background delivery.
         5. Return a success message.
 
     Request Body (JSON):
@@ -42,13 +104,11 @@ def create_and_provision_doctor():
     Returns:
         JSON: Success message.
     """
-    data = request.get_json() or {}
-    name = data.get('name')
-    email = data.get('email')
-    is_admin = data.get('is_admin', False)
-
-    if not (name and email):
-        return jsonify({"msg": "Both name and email are required"}), 400
+    try:
+        entry = parse_doctor_entry(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    name, email, is_admin = entry['name'], entry['email'], entry['is_admin']
 
     # Step 1: Create the doctor record
     doctor = Doctor(name=name, email=email, is_admin=is_admin)
@@ -56,27 +116,191 @@ def create_and_provision_doctor():
     db.session.commit()
 
     # Step 2: Revoke all their previous API keys (if any exist)
+    revoked = []
     for key in doctor.api_keys:
         key.is_active = False
+        revoked.append(key.key)
+    revoke_api_key_tokens(*revoked)
 
     # Step 3: Generate & store a new API key
     new_key = secrets.token_hex(32)
     api_key = APIKey(key=new_key, doctor=doctor)
     db.session.add(api_key)
-    db.session.commit()
 
-    # Step 4: Email the new API key to the doctor
-    msg = Message(
-        subject="Your CEMA Health System API Key",
+    # Step 4: Queue the new API key email in the same transaction as the key
+    queue_email(
+        subject=API_KEY_EMAIL_SUBJECT,
         recipients=[email],
-        body=(
-            f"Hello {name},\n\n"
-            f"Welcome to CEMA Health System!\n\n"
-            f"Your API key is:\n\n    {new_key}\n\n"
-            "Please keep it secret, and use it as API-KEY in your requests."
-        )
+        body=api_key_email_body(name, new_key)
     )
-    mail.send(msg)
+    db.session.commit()
+
+    # Revoked keys must stop authenticating immediately, not after the cache TTL
+    invalidate_api_keys(*revoked)
+    outbox_worker.notify()
 
     # Step 5: Return success response
-    return jsonify({"msg": "Doctor created & API key emailed"}), 200
+    return jsonify({"msg": "Doctor created & API key email queued"}), 200
+
+
+
+@admin_bp.route('/doctors/bulk', methods=['POST'])
+@super_admin_required
+def bulk_provision_doctors():
+    """
+    Create many doctors and provision an API key for each in one transaction.
+
+    Doctors are inserted with a single multi-row statement that skips emails
+    that are already registered, their API keys with a second one, and all
+    key emails are queued in the outbox for batched background delivery.
+
+    Request Body (JSON):
+    {
+        "doctors": [
+            {"name": "Doctor Name", "email": "doctor@example.com", "is_admin": false},
+            ...
+        ]
+    }
+
+    Returns:
+        JSON: The emails that were provisioned, the emails that conflicted
+        with existing doctors (or repeat within the request), and invalid
+        entries by index.
+    """
+    data = request.get_json() or {}
+    entries = data.get('doctors')
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"msg": "doctors must be a non-empty list"}), 400
+    if len(entries) > MAX_BULK_DOCTORS:
+        return jsonify({"msg": f"At most {MAX_BULK_DOCTORS} doctors per request"}), 400
+
+    invalid, conflicts, doctors = [], [], {}
+    for index, entry in enumerate(entries):
+        try:
+            doctor = parse_doctor_entry(entry)
+        except ValueError as e:
+            invalid.append({"index": index, "msg": str(e)})
+            continue
+        if doctor['email'] in doctors:
+            conflicts.append({"email": doctor['email'], "msg": "Duplicate email in request"})
+            continue
+        doctors[doctor['email']] = doctor
+
+    created = insert_doctors(list(doctors.values()))
+    conflicts.extend(
+        {"email": email, "msg": "Email already registered"}
+        for email in doctors if email not in created
+    )
+
+    # Generate a key per new doctor and queue all the key emails
+    now = datetime.utcnow()
+    keys = {email: secrets.token_hex(32) for email in created}
+    if keys:
+        db.session.execute(APIKey.__table__.insert(), [
+            {"key": keys[email], "doctor_id": created[email], "created_at": now, "is_active": True}
+            for email in keys
+        ])
+        queue_emails([
+            (API_KEY_EMAIL_SUBJECT, [email], api_key_email_body(doctors[email]['name'], key))
+            for email, key in keys.items()
+        ])
+    db.session.commit()
+    outbox_worker.notify()
+
+    return jsonify({
+        "msg": f"{len(created)} doctors created & API key emails queued",
+        "created": list(created),
+        "conflicts": conflicts,
+        "invalid": invalid,
+    }), 200
+
+
+def insert_doctors(rows):
+    """
+    Insert doctors in one statement, skipping emails that already exist.
+
+    Args:
+        rows (list): Dicts with name, email and is_admin.
+
+    Returns:
+        dict: email -> new doctor id, for the doctors actually inserted.
+    """
+    if not rows:
+        return {}
+
+    if supports_insert_ignore():
+        stmt = insert_ignore(Doctor, ['email']).returning(Doctor.email, Doctor.id)
+        return dict(db.session.execute(stmt, rows).all())
+
+    # Fallback: filter out registered emails before inserting
+    emails = [row['email'] for row in rows]
+    existing = set(db.session.execute(
+        select(Doctor.email).where(Doctor.email.in_(emails))
+    ).scalars())
+    rows = [row for row in rows if row['email'] not in existing]
+    if not rows:
+        return {}
+    db.session.execute(Doctor.__table__.insert(), rows)
+    return dict(db.session.execute(
+        select(Doctor.email, Doctor.id).where(Doctor.email.in_([row['email'] for row in rows]))
+    ).all())
+
+
+@admin_bp.route('/db-pool', methods=['GET'])
+@super_admin_required
+def db_pool_status():
+    """
+    Report this worker's database connection pool usage.
+
+    Includes pool size, checked-out and overflow connections and, for the
+    default pool, checkout counts, timeouts and time spent waiting for a
+    connection.
+
+    Returns:
+        JSON: Pool statistics.
+    """
+    return jsonify(pool_stats(db.engine)), 200
+
+
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+@read_only
+@super_admin_required
+def export_dataset(dataset):
+    """
+    Stream a full extract of clients, programs or enrollments.
+
+    Query parameters:
+        - format (str): 'csv' (default), 'ndjson', or 'parquet' when pyarrow
+          is installed.
+        - after (int): Only rows with a greater id; pass the last id received
+          to resume an interrupted export.
+
+    Rows are read in id order from a server-side cursor and sent as they are
+    encoded, so the export runs in constant memory.
+
+    Returns:
+        The extract as an attachment, or JSON error for an unknown dataset
+        or format.
+    """
+    if dataset not in DATASETS:
+        return jsonify({"msg": f"dataset must be one of: {', '.join(DATASETS)}"}), 404
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in available_formats():
+        return jsonify({"msg": f"format must be one of: {', '.join(available_formats())}"}), 400
+    try:
+        after = request.args.get('after')
+        after = int(after) if after else None
+    except ValueError:
+        return jsonify({"msg": "after must be an integer"}), 400
+
+    chunks = export(
+        dataset, fmt, after=after, batch_size=current_app.config['EXPORT_BATCH_SIZE'],
+        dumps=current_app.json.dumps_bytes, header=after is None,
+    )
+    mimetype, extension = FORMATS[fmt]
+    return Response(
+        stream_with_context(chunks), mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'},
+    )
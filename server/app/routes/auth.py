@@ -1,36 +1,72 @@
 """
 Authentication routes for API key validation.
 
-This module provides a route to validate an API key
-and retrieve associated doctor information.
+This module provides a route to validate an API key, retrieve associated
+doctor information and exchange the key for a short-lived access token,
+and a route to revoke an access token before it expires.
 """
 
+from datetime import datetime
 from flask import Blueprint, jsonify, request
+from app import db
 from app.utils.auth import api_key_required
+from app.utils.replicas import read_only
+from app.utils.tokens import issue_access_token, revoke_tokens, tokens_enabled
 
 # Create a Blueprint for authentication-related routes
 auth_bp = Blueprint('auth', __name__)
 
 
-@auth_bp.route('/validate', methods=['GET'])
+@auth_bp.route('/validate', methods=['GET', 'POST'])
+@read_only
 @api_key_required
 def validate_api_key():
     """
     Validate the provided API key and return doctor details.
 
     This route is protected and requires a valid API key in the request headers.
+    When access tokens are enabled, an API key request also returns a signed
+    token to send as `Authorization: Bearer <token>` on later requests, which
+    are then authenticated without a database lookup.
 
     Returns:
-        JSON: Doctor information if the API key is valid.
+        JSON: Doctor information if the API key is valid, plus
+        `access_token`, `token_type` and `expires_in` (seconds).
     """
     
     doctor = request.doctor
 
-    return jsonify({
+    body = {
         "doctor": {
             "id": doctor.id,
             "name": doctor.name,
             "email": doctor.email,
             "is_admin": doctor.is_admin
         }
-    }), 200
+    }
+    # Tokens are only minted from an API key, never from another token, so
+    # a revoked key stops producing them
+    api_key = getattr(request, 'api_key', None)
+    if api_key and tokens_enabled():
+        token, expires_in = issue_access_token(doctor, api_key)
+        body.update({"access_token": token, "token_type": "Bearer", "expires_in": expires_in})
+
+    return jsonify(body), 200
+
+
+@auth_bp.route('/revoke', methods=['POST'])
+@api_key_required
+def revoke_access_token():
+    """
+    Revoke the access token used to make this request (e.g. on logout).
+
+    Returns:
+        JSON: Success message, or 400 if the request did not use a token.
+    """
+    claims = getattr(request, 'token_claims', None)
+    if not claims:
+        return jsonify({"msg": "Only access tokens can be revoked"}), 400
+
+    revoke_tokens(datetime.utcfromtimestamp(claims['exp']), claims['jti'])
+    db.session.commit()
+    return jsonify({"msg": "Access token revoked"}), 200
@@ -1,13 +1,43 @@
-from flask import Blueprint, jsonify, request
+import io
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
 from datetime import datetime
-from sqlalchemy import or_
+from sqlalchemy import select
 from app.utils.auth import api_key_required
+from app.utils.replicas import read_only
+from app.utils.pagination import get_page_args, set_next_cursor
+from app.utils.serializers import serializer_for
+from app.utils import search
+from app.utils.dedup import find_possible_duplicates
+from app.utils.client_import import import_clients, iter_records
 from app import db
-from app.models import Client
+from app.models import Client, Enrollment, HealthProgram
 
 # Initialize Blueprint for client-related routes
 clients_bp = Blueprint('clients', __name__)
 
+# Number of rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 1000
+
+# Default and maximum number of ranked search results per page
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Most profiles fetched by one /batch request
+MAX_BATCH_IDS = 500
+
+# Streamed bulk registration formats, by request Content-Type
+IMPORT_FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+}
+
+CLIENT_SUMMARY = serializer_for(Client, 'summary')
+CLIENT_PROFILE = serializer_for(Client, 'profile')
+CLIENT_PROGRAM = serializer_for(Enrollment, 'client_program')
+
+# Client fields returned in a profile, in response order
+PROFILE_FIELDS = CLIENT_PROFILE.keys
+
 # Route for registering a new client
 @clients_bp.route('/register', methods=['POST'])
 @api_key_required
@@ -26,8 +56,12 @@ def register_client():
     # Attempt to parse the client's date of birth (DOB)
     try:
         dob = datetime.strptime(data.get('date_of_birth'), '%Y-%m-%d').date() if data.get('date_of_birth') else None
-    except ValueError:
+    except (TypeError, ValueError):
         return jsonify({"msg": "Invalid date_of_birth format"}), 400
+    try:
+        check_text_fields(data)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
     # Create a new Client object with the provided data
     client = Client(
@@ -43,37 +77,181 @@ def register_client():
     if not (client.first_name and client.last_name):
         return jsonify({"msg": "first_name and last_name required"}), 400
 
+    # Look for the same patient registered before (by anyone); checked
+    # before adding so the new client cannot match itself
+    duplicates = []
+    if current_app.config['DEDUP_ON_REGISTER']:
+        duplicates = possible_duplicates(
+            client.first_name, client.last_name, dob, client.gender, client.contact_info
+        )
+
     # Save the new client to the database
     db.session.add(client)
     db.session.commit()
 
-    # Return success message
-    return jsonify({"message": "Client registered successfully"}), 200
+    # Return success message, with any existing clients it may duplicate
+    return jsonify({"message": "Client registered successfully", "possible_duplicates": duplicates}), 200
+
+# Route for checking a client for duplicates without registering them
+@clients_bp.route('/duplicates', methods=['POST'])
+@read_only
+@api_key_required
+def check_duplicates():
+    """
+    Lists existing clients that may be the patient described in the body.
+
+    Request body takes the fields of /register (first_name and last_name
+    are required), so a form can warn before the client is registered.
+
+    Returns:
+        JSON list of possible duplicates, most likely first, each with a
+        score between DEDUP_THRESHOLD and 1.
+    """
+    data = request.get_json() or {}
+    if not (data.get('first_name') and data.get('last_name')):
+        return jsonify({"msg": "first_name and last_name required"}), 400
+    try:
+        dob = datetime.strptime(data.get('date_of_birth'), '%Y-%m-%d').date() if data.get('date_of_birth') else None
+    except (TypeError, ValueError):
+        return jsonify({"msg": "Invalid date_of_birth format"}), 400
+    try:
+        check_text_fields(data)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    return jsonify(possible_duplicates(
+        data['first_name'], data['last_name'], dob, data.get('gender'), data.get('contact_info')
+    )), 200
+
+
+def check_text_fields(data):
+    """
+    Check that the client fields compared for duplicates are strings.
+
+    Raises:
+        ValueError: Naming the first field that is present but not a string.
+    """
+    for field in ('first_name', 'last_name', 'gender', 'contact_info'):
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+
+
+def possible_duplicates(first_name, last_name, date_of_birth, gender, contact_info):
+    """
+    Run the duplicate check with the configured limits and serialize the matches.
+    """
+    config = current_app.config
+    matches = find_possible_duplicates(
+        first_name, last_name, date_of_birth, gender, contact_info,
+        threshold=config['DEDUP_THRESHOLD'], max_candidates=config['DEDUP_MAX_CANDIDATES'],
+    )
+    return [{
+        "id": row.id,
+        "first_name": row.first_name,
+        "last_name": row.last_name,
+        "date_of_birth": row.date_of_birth,
+        "gender": row.gender,
+        "score": similarity,
+    } for similarity, row in matches]
+
+# Route for registering many clients at once
+@clients_bp.route('/bulk', methods=['POST'])
+@api_key_required
+def bulk_register_clients():
+    """
+    Registers many clients in one request.
+    This endpoint requires the user to be authenticated with an API key.
+
+    The body may be a JSON array of client objects (Content-Type
+    application/json), CSV with a header row (text/csv) or one JSON object
+    per line (application/x-ndjson). CSV and NDJSON bodies are read as a
+    stream. Rows are inserted in batches of `batch_size` (query parameter,
+    defaults to IMPORT_BATCH_SIZE); invalid rows are reported and skipped.
+    """
+    try:
+        batch_size = int(request.args.get('batch_size', current_app.config['IMPORT_BATCH_SIZE']))
+    except ValueError:
+        return jsonify({"msg": "batch_size must be an integer"}), 400
+    if batch_size < 1:
+        return jsonify({"msg": "batch_size must be a positive integer"}), 400
+
+    mimetype = request.mimetype
+    if mimetype == 'application/json':
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            return jsonify({"msg": "Body must be a JSON array of clients"}), 400
+    elif mimetype in IMPORT_FORMATS:
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        records = iter_records(stream, IMPORT_FORMATS[mimetype])
+    else:
+        return jsonify({"msg": "Unsupported Content-Type"}), 415
+
+    summary = import_clients(records, request.doctor.id, batch_size)
+    return jsonify({"message": "Bulk registration finished", **summary}), 200
 
 # Route for listing all clients
 @clients_bp.route('/', methods=['GET'])
+@read_only
 @api_key_required
 def list_clients():
     """
-    Lists all registered clients in the system. 
+    Lists registered clients in the system, one page at a time.
     This endpoint requires the user to be authenticated with an API key.
+
+    Query parameters:
+        - limit (int): Page size (default 100, max 1000).
+        - after (int): Return clients with an ID greater than this cursor.
+        - format (str): 'ndjson' streams every client after the cursor,
+          one JSON object per line, instead of returning a single page.
+
+    The next cursor is returned in the X-Next-Cursor header when more
+    rows may be available.
     """
-    # Query all clients from the database
-    clients = Client.query.all()
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Only load the columns we return, keyed on the primary key index
+    query = CLIENT_SUMMARY.select().order_by(Client.id)
+    if after is not None:
+        query = query.where(Client.id > after)
+
+    if request.args.get('format') == 'ndjson':
+        # Stream rows from a server-side cursor instead of buffering them
+        dumps = current_app.json.dumps_bytes
+
+        def generate():
+            rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            # One chunk per fetched batch rather than per row
+            for batch in rows.partitions():
+                yield b"".join(dumps(CLIENT_SUMMARY.dump(row)) + b"\n" for row in batch)
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    rows = db.session.execute(query.limit(limit)).all()
 
     # Return a list of client IDs and names
-    return jsonify([
-        {"id": client.id, "first_name": client.first_name, "last_name": client.last_name}
-        for client in clients
-    ]), 200
+    response = jsonify(CLIENT_SUMMARY.dump_all(rows))
+    return set_next_cursor(response, rows, limit), 200
 
 # Route for searching clients by name
 @clients_bp.route('/search', methods=['GET'])
+@read_only
 @api_key_required
 def search_clients():
     """
     Searches for clients based on a query string (first name or last name).
     This endpoint requires the user to be authenticated with an API key.
+
+    Query parameters:
+        - q (str): The search term (required).
+        - limit (int): Maximum number of results (default 20, max 100).
+        - offset (int): Number of ranked results to skip.
+
+    Results are ranked exact match first, then prefix, then substring.
+    The offset of the next page is returned in the X-Next-Offset header.
     """
     # Get the search query from request arguments
     q = request.args.get('q', '').strip()
@@ -82,47 +260,194 @@ def search_clients():
     if not q:
         return jsonify({"msg": "Query parameter 'q' is required"}), 400
 
+    try:
+        limit = min(int(request.args.get('limit', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"msg": "limit and offset must be integers"}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({"msg": "limit must be positive and offset non-negative"}), 400
+
     # Search for clients whose first or last name matches the query
-    like = f"%{q}%"  # Using SQL 'LIKE' for partial matching
-    matches = Client.query.filter(
-        or_(Client.first_name.ilike(like), Client.last_name.ilike(like))
-    ).all()
+    matches = search.search_clients(q, limit, offset)
 
     # Return matched clients
-    return jsonify([
-        {"id": client.id, "first_name": client.first_name, "last_name": client.last_name}
-        for client in matches
-    ]), 200
+    response = jsonify(CLIENT_SUMMARY.dump_all(matches))
+    if len(matches) == limit:
+        response.headers['X-Next-Offset'] = str(offset + limit)
+    return response, 200
+
+# Route for fetching many client profiles at once
+@clients_bp.route('/batch', methods=['GET', 'POST'])
+@read_only
+@api_key_required
+def get_client_profiles():
+    """
+    Retrieves the profiles of several clients in one request.
+
+    The IDs are given as `ids=1,2,3` in the query string, or for long lists
+    as a JSON body { "ids": [1, 2, 3] } with POST (at most 500 either way).
+    `fields` works as for a single profile.
+
+    The clients are loaded with one IN query and their enrollments and
+    programs with a second one, however many IDs are requested.
+
+    Returns:
+        JSON object mapping each requested ID, in request order, to the same
+        payload as GET /api/clients/<id>, or null if there is no such client.
+    """
+    try:
+        if request.method == 'POST':
+            raw_ids = (request.get_json(silent=True) or {}).get('ids')
+        else:
+            raw_ids = request.args.get('ids', '').split(',')
+        ids = parse_batch_ids(raw_ids)
+        fields = parse_profile_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    return jsonify(batch_profiles(ids, fields)), 200
+
 
 # Route for fetching a client's full profile
 @clients_bp.route('/<int:client_id>', methods=['GET'])
+@read_only
 @api_key_required
 def get_client_profile(client_id):
     """
     Retrieves a client's profile by ID, including the programs they are enrolled in.
     This endpoint requires the user to be authenticated with an API key.
+
+    Query parameters:
+        - fields (str): Optional comma-separated projection, e.g.
+          'first_name,last_name' to skip contact_info and programs.
+          Accepts any client field plus 'programs'. Defaults to everything.
+
+    The requested client columns, enrollments and programs are selected
+    with a single outer-joined query and serialized from the rows, without
+    loading ORM instances.
     """
+    try:
+        fields = parse_profile_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
     # Fetch the client by ID or return 404 if not found
-    client = Client.query.get_or_404(client_id)
-
-    # Get the programs the client is enrolled in
-    programs = [{
-        "id": e.program.id,
-        "name": e.program.name,
-        "enrolled_at": e.enrolled_at.isoformat(),  # Date when the client enrolled
-        "status": e.status  # Enrollment status
-    } for e in client.enrollments]
-
-    # Return the client's profile and their programs
-    return jsonify({
-        "client": {
-            "id": client.id,
-            "first_name": client.first_name,
-            "last_name": client.last_name,
-            "date_of_birth": client.date_of_birth.isoformat() if client.date_of_birth else None,
-            "gender": client.gender,
-            "contact_info": client.contact_info,
-            "registered_at": client.registered_at.isoformat()
-        },
-        "programs": programs  # Include programs the client is enrolled in
-    }), 200
+    rows = db.session.execute(profile_query(client_id, fields)).all()
+    if not rows:
+        abort(404)
+
+    # Return the client's profile and, if requested, their programs
+    return jsonify(serialize_profile(rows, fields)), 200
+
+
+def parse_profile_fields(raw):
+    """
+    Parse the `fields` projection of a profile request.
+
+    Args:
+        raw (str): Comma-separated field names, or None for all fields.
+
+    Returns:
+        set: The requested field names.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not raw:
+        return set(PROFILE_FIELDS) | {'programs'}
+
+    fields = {f.strip() for f in raw.split(',') if f.strip()}
+    unknown = fields - set(PROFILE_FIELDS) - {'programs'}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields | {'id'}
+
+
+def profile_query(client_id, fields):
+    """
+    Select only the requested client columns and, when programs are
+    requested, one row per enrollment with the program's columns appended.
+    """
+    columns = [c for key, c in zip(CLIENT_PROFILE.keys, CLIENT_PROFILE.columns) if key in fields]
+    query = select(*columns).select_from(Client).where(Client.id == client_id)
+    if 'programs' in fields:
+        query = (
+            query.add_columns(*CLIENT_PROGRAM.columns)
+            .outerjoin(Enrollment, Enrollment.client_id == Client.id)
+            .outerjoin(HealthProgram, HealthProgram.id == Enrollment.program_id)
+            .order_by(Enrollment.id)
+        )
+    return query
+
+
+def serialize_profile(rows, fields):
+    """
+    Serialize the rows of a `profile_query` into the profile payload.
+    """
+    keys = [key for key in CLIENT_PROFILE.keys if key in fields]
+    width = len(keys)
+    result = {"client": dict(zip(keys, rows[0][:width]))}
+    if 'programs' in fields:
+        # Get the programs the client is enrolled in; a client without
+        # enrollments comes back as a single row of NULL program columns
+        result["programs"] = [
+            CLIENT_PROGRAM.dump(row[width:]) for row in rows if row[width] is not None
+        ]
+    return result
+
+
+def parse_batch_ids(raw):
+    """
+    Validate the client IDs of a batch request.
+
+    Args:
+        raw (list): IDs as ints or strings; blank strings are ignored.
+
+    Returns:
+        list: The distinct IDs, in request order.
+
+    Raises:
+        ValueError: If no IDs, too many or a non-integer ID is given.
+    """
+    if not isinstance(raw, list):
+        raise ValueError("ids must be a list of client IDs")
+    try:
+        ids = [int(i) for i in raw if not (isinstance(i, str) and not i.strip())]
+    except (TypeError, ValueError):
+        raise ValueError("ids must be integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids is required")
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+
+def batch_profiles(ids, fields):
+    """
+    Build the profiles of many clients with two queries.
+
+    Returns:
+        dict: ID -> profile payload (as built by `serialize_profile`) or None.
+    """
+    keys = [key for key in CLIENT_PROFILE.keys if key in fields]
+    columns = [c for key, c in zip(CLIENT_PROFILE.keys, CLIENT_PROFILE.columns) if key in fields]
+    found = {
+        row.id: {"client": dict(zip(keys, row))}
+        for row in db.session.execute(select(*columns).where(Client.id.in_(ids)))
+    }
+
+    if 'programs' in fields and found:
+        for profile in found.values():
+            profile["programs"] = []
+        rows = db.session.execute(
+            select(Enrollment.client_id, *CLIENT_PROGRAM.columns)
+            .join(HealthProgram, HealthProgram.id == Enrollment.program_id)
+            .where(Enrollment.client_id.in_(list(found)))
+            .order_by(Enrollment.client_id, Enrollment.id)
+        )
+        for row in rows:
+            found[row[0]]["programs"].append(CLIENT_PROGRAM.dump(row[1:]))
+
+    return {client_id: found.get(client_id) for client_id in ids}
@@ -1,11 +1,20 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime
+from flask import Blueprint, abort, jsonify, request
+from sqlalchemy import exists, func, literal, select
 from app import db
-from app.models import Client, HealthProgram, Enrollment
+from app.models import ENROLLMENT_STATUSES, Client, HealthProgram, Enrollment, ProgramEnrollmentCount
 from app.utils.auth import api_key_required
+from app.utils.bulk import chunked, insert_ignore, supports_insert_ignore
 
 # Blueprint for handling client enrollments in health programs
 enroll_bp = Blueprint('enrollments', __name__)
 
+# Number of client IDs resolved and inserted per statement in cohort enrollment
+COHORT_BATCH_SIZE = 5000
+
+# Client columns a cohort filter may match on
+COHORT_FILTERS = ('gender', 'created_by_id', 'registered_after', 'registered_before')
+
 @enroll_bp.route('/<int:client_id>', methods=['POST'])
 @api_key_required
 def enroll_client(client_id):
@@ -18,8 +27,12 @@ def enroll_client(client_id):
     Request body should include:
         - program_ids (list): A list of health program IDs to enroll the client in.
 
+    The programs are resolved with one IN query and the enrollments written
+    with a single multi-row INSERT that skips existing (client, program) pairs.
+
     Returns:
-        JSON response indicating success or failure.
+        JSON response listing the program IDs that were enrolled, skipped
+        (already enrolled) or unknown.
     """
     # Get the data from the request (assumed to be in JSON format)
     data = request.get_json() or {}
@@ -28,40 +41,287 @@ def enroll_client(client_id):
     program_ids = data.get('program_ids', [])
 
     # Ensure program_ids is a list and contains at least one program ID
-    if not program_ids or not isinstance(program_ids, list):
+    if (not program_ids or not isinstance(program_ids, list)
+            or not all(isinstance(p, (int, str)) for p in program_ids)):
         return jsonify({"msg": "program_ids must be a list of IDs"}), 400
 
     # Retrieve the client by their client_id, return 404 if not found
-    client = Client.query.get_or_404(client_id)
+    if db.session.execute(select(Client.id).where(Client.id == client_id)).first() is None:
+        abort(404)
 
-    # Initialize a list to hold the new enrollment objects
-    enrollments = []
+    # De-duplicate while keeping the caller's order; digit strings such as
+    # "3" are program IDs too, anything else can only be unknown
+    requested = list(dict.fromkeys(parse_program_id(p) for p in program_ids))
+    candidate_ids = [p for p in requested if isinstance(p, int) and not isinstance(p, bool)]
 
-    # Process each program ID to enroll the client
-    for program_id in program_ids:
-        # Find the program corresponding to the current ID
-        program = HealthProgram.query.get(program_id)
-        if not program:
-            # If the program doesn't exist, skip to the next one
-            continue
-        
-        # Check if the client is already enrolled in the program
-        existing = Enrollment.query.filter_by(client_id=client.id, program_id=program_id).first()
-        if existing:
-            # If already enrolled, skip to the next program
-            continue
-        
-        # Create a new enrollment record
-        enrollment = Enrollment(client=client, program=program)
-        
-        # Add the new enrollment to the session for later commit
-        db.session.add(enrollment)
-        enrollments.append(enrollment)
+    # Resolve every requested program in one query
+    known = set(db.session.execute(
+        select(HealthProgram.id).where(HealthProgram.id.in_(candidate_ids))
+    ).scalars()) if candidate_ids else set()
+
+    enrolled = insert_enrollments(client_id, [p for p in candidate_ids if p in known])
 
     # Commit the changes to the database
     db.session.commit()
 
-    # Return a success message indicating that the client was enrolled
+    # Return a summary of what happened to each requested program
+    return jsonify({
+        "message": "Client enrolled successfully",
+        "enrolled": [p for p in requested if p in enrolled],
+        "skipped": [p for p in requested if p in known and p not in enrolled],
+        "unknown": [p for p in requested if p not in known],
+    }), 200
+
+
+def parse_program_id(value):
+    """
+    Return `value` as an integer program ID if it is one (or a string of
+    digits), otherwise unchanged.
+    """
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value
+
+
+@enroll_bp.route('/<int:client_id>/<int:program_id>', methods=['PATCH'])
+@api_key_required
+def update_enrollment_status(client_id, program_id):
+    """
+    Change the status of a client's enrollment in a program.
+
+    Args:
+        client_id (int): The enrolled client.
+        program_id (int): The program.
+
+    Request body should include:
+        - status (string): One of active, completed or dropped.
+
+    Returns:
+        JSON response with the enrollment's previous and new status.
+    """
+    data = request.get_json() or {}
+    status = data.get('status')
+    if status not in ENROLLMENT_STATUSES:
+        return jsonify({"msg": f"status must be one of: {', '.join(ENROLLMENT_STATUSES)}"}), 400
+
+    # Lock the row so concurrent updates cannot both count the same transition
+    enrollment = db.session.execute(
+        select(Enrollment)
+        .where(Enrollment.client_id == client_id, Enrollment.program_id == program_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if enrollment is None:
+        abort(404)
+
+    previous = enrollment.status or 'active'
+    if previous != status:
+        enrollment.status = status
+        ProgramEnrollmentCount.add({(program_id, previous): -1, (program_id, status): 1})
+    db.session.commit()
+
     return jsonify({
-        "message": "Client enrolled successfully"
+        "message": "Enrollment updated successfully",
+        "previous_status": previous,
+        "status": status,
     }), 200
+
+
+def insert_enrollments(client_id, program_ids):
+    """
+    Insert enrollments of one client into the given (existing) programs,
+    skipping programs the client is already enrolled in.
+
+    Args:
+        client_id (int): The client to enroll.
+        program_ids (list): IDs of programs known to exist.
+
+    Returns:
+        set: The program IDs for which a new enrollment was written.
+    """
+    if not program_ids:
+        return set()
+
+    now = datetime.utcnow()
+    rows = [
+        {"client_id": client_id, "program_id": p, "enrolled_at": now, "status": "active"}
+        for p in program_ids
+    ]
+
+    if supports_insert_ignore():
+        # The unique constraint makes this race-free; RETURNING reports
+        # only the rows that were actually inserted
+        stmt = insert_ignore(Enrollment, ['client_id', 'program_id']).returning(Enrollment.program_id)
+        enrolled = set(db.session.execute(stmt, rows).scalars())
+        ProgramEnrollmentCount.add({(p, 'active'): 1 for p in enrolled})
+        return enrolled
+
+    # Fallback: filter out existing pairs with one query before inserting
+    existing = set(db.session.execute(
+        select(Enrollment.program_id).where(
+            Enrollment.client_id == client_id, Enrollment.program_id.in_(program_ids)
+        )
+    ).scalars())
+    rows = [row for row in rows if row["program_id"] not in existing]
+    if rows:
+        db.session.execute(Enrollment.__table__.insert(), rows)
+    enrolled = {row["program_id"] for row in rows}
+    ProgramEnrollmentCount.add({(p, 'active'): 1 for p in enrolled})
+    return enrolled
+
+
+@enroll_bp.route('/program/<int:program_id>', methods=['POST'])
+@api_key_required
+def enroll_cohort(program_id):
+    """
+    Enroll many clients into one health program in a single transaction.
+
+    Args:
+        program_id (int): The ID of the program to enroll clients into.
+
+    Request body should include exactly one of:
+        - client_ids (list): IDs of the clients to enroll.
+        - filter (dict): Enroll every client matching all of the given
+          criteria: gender, created_by_id, registered_after,
+          registered_before (ISO dates). The selection and insert run as
+          one INSERT ... SELECT on the database.
+
+    Returns:
+        JSON summary with the number of enrollments inserted, clients that
+        were already enrolled (duplicate) and client IDs that do not exist
+        (missing).
+    """
+    data = request.get_json() or {}
+    client_ids = data.get('client_ids')
+    criteria = data.get('filter')
+
+    if (client_ids is None) == (criteria is None):
+        return jsonify({"msg": "Provide either client_ids or filter"}), 400
+
+    # Make sure the program exists before doing any work
+    if db.session.execute(select(HealthProgram.id).where(HealthProgram.id == program_id)).first() is None:
+        abort(404)
+
+    if client_ids is not None:
+        if not isinstance(client_ids, list) or not all(
+                isinstance(c, int) and not isinstance(c, bool) for c in client_ids):
+            return jsonify({"msg": "client_ids must be a list of integer IDs"}), 400
+        summary = enroll_client_ids(program_id, list(dict.fromkeys(client_ids)))
+    else:
+        try:
+            conditions = cohort_conditions(criteria)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+        summary = enroll_matching_clients(program_id, conditions)
+
+    # All batches are committed together
+    db.session.commit()
+
+    return jsonify({"message": "Cohort enrolled successfully", **summary}), 200
+
+
+def cohort_conditions(criteria):
+    """
+    Translate a cohort filter into SQL conditions on Client.
+
+    Raises:
+        ValueError: If the filter is malformed.
+    """
+    if not isinstance(criteria, dict) or not criteria:
+        raise ValueError("filter must be a non-empty object")
+    unknown = set(criteria) - set(COHORT_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+
+    conditions = []
+    if 'gender' in criteria:
+        conditions.append(Client.gender == criteria['gender'])
+    if 'created_by_id' in criteria:
+        conditions.append(Client.created_by_id == criteria['created_by_id'])
+    try:
+        if 'registered_after' in criteria:
+            conditions.append(Client.registered_at >= datetime.fromisoformat(criteria['registered_after']))
+        if 'registered_before' in criteria:
+            conditions.append(Client.registered_at < datetime.fromisoformat(criteria['registered_before']))
+    except (TypeError, ValueError):
+        raise ValueError("registered_after and registered_before must be ISO dates")
+    return conditions
+
+
+def enroll_client_ids(program_id, client_ids):
+    """
+    Enroll the given clients into a program in batches of COHORT_BATCH_SIZE.
+
+    Each batch costs two statements: one IN query resolving which clients
+    exist, and one multi-row INSERT skipping existing enrollments.
+
+    Returns:
+        dict: inserted, duplicate and missing counts.
+    """
+    inserted = duplicate = missing = 0
+    now = datetime.utcnow()
+
+    for batch in chunked(client_ids, COHORT_BATCH_SIZE):
+        existing = list(db.session.execute(
+            select(Client.id).where(Client.id.in_(batch))
+        ).scalars())
+        missing += len(batch) - len(existing)
+        if not existing:
+            continue
+
+        rows = [
+            {"client_id": c, "program_id": program_id, "enrolled_at": now, "status": "active"}
+            for c in existing
+        ]
+        if supports_insert_ignore():
+            stmt = insert_ignore(Enrollment, ['client_id', 'program_id']).returning(Enrollment.client_id)
+            written = len(db.session.execute(stmt, rows).all())
+        else:
+            enrolled = set(db.session.execute(
+                select(Enrollment.client_id).where(
+                    Enrollment.program_id == program_id, Enrollment.client_id.in_(existing)
+                )
+            ).scalars())
+            rows = [row for row in rows if row["client_id"] not in enrolled]
+            if rows:
+                db.session.execute(Enrollment.__table__.insert(), rows)
+            written = len(rows)
+
+        inserted += written
+        duplicate += len(existing) - written
+
+    ProgramEnrollmentCount.add({(program_id, 'active'): inserted})
+    return {"inserted": inserted, "duplicate": duplicate, "missing": missing}
+
+
+def enroll_matching_clients(program_id, conditions):
+    """
+    Enroll every client matching `conditions` with a single INSERT ... SELECT.
+
+    Returns:
+        dict: inserted, duplicate and missing counts (missing is always 0).
+    """
+    matched = db.session.execute(
+        select(func.count(Client.id)).where(*conditions)
+    ).scalar_one()
+
+    already_enrolled = exists().where(
+        Enrollment.client_id == Client.id, Enrollment.program_id == program_id
+    )
+    now = datetime.utcnow()
+    source = select(
+        Client.id,
+        literal(program_id),
+        literal(now),
+        literal('active'),
+        literal(now),
+    ).where(*conditions, ~already_enrolled)
+
+    columns = ['client_id', 'program_id', 'enrolled_at', 'status', 'updated_at']
+    if supports_insert_ignore():
+        stmt = insert_ignore(Enrollment, ['client_id', 'program_id']).from_select(columns, source)
+    else:
+        stmt = Enrollment.__table__.insert().from_select(columns, source)
+    inserted = db.session.execute(stmt).rowcount
+    ProgramEnrollmentCount.add({(program_id, 'active'): inserted})
+
+    return {"inserted": inserted, "duplicate": matched - inserted, "missing": 0}
@@ -1,13 +1,29 @@
-from flask import Blueprint, jsonify, request
+import hashlib
+from flask import Blueprint, Response, abort, current_app, jsonify, request
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from app.utils.auth import api_key_required
+from app.utils.replicas import read_only
+from app.utils.cache import VersionedCache
+from app.utils.pagination import (
+    get_page_args, parse_timestamp_cursor, set_next_cursor, timestamp_cursor
+)
 from app import db
-from app.models import HealthProgram
+from app.models import (
+    ENROLLMENT_STATUSES, CacheGeneration, Client, Enrollment, HealthProgram, ProgramEnrollmentCount
+)
+from app.utils.serializers import serializer_for
 
 # Blueprint for handling health program-related operations
 programs_bp = Blueprint('programs', __name__)
 
+# Serialized program catalogue, rebuilt whenever the 'programs' generation moves
+PROGRAMS_GENERATION = 'programs'
+catalogue_cache = VersionedCache()
+
+PROGRAM_CATALOGUE = serializer_for(HealthProgram, 'catalogue')
+PROGRAM_ENROLLMENT = serializer_for(Enrollment, 'program_listing')
+
 @programs_bp.route('/create', methods=['POST'])
 @api_key_required
 def create_program():
@@ -42,6 +58,8 @@ def create_program():
     try:
         # Add the program to the database session and commit
         db.session.add(program)
+        # Invalidate every worker's cached catalogue in the same transaction
+        CacheGeneration.bump(PROGRAMS_GENERATION)
         db.session.commit()
     except IntegrityError:
         # Rollback and return an error if the program name already exists
@@ -55,24 +73,178 @@ def create_program():
 
 
 @programs_bp.route('/list', methods=['GET'])
+@read_only
 @api_key_required
 def list_programs():
     """
     Endpoint to list all health programs.
 
+    The serialized list is cached per worker and only rebuilt when the
+    shared 'programs' generation changes, so most calls cost a single
+    primary-key lookup. Responses carry a strong ETag; a matching
+    If-None-Match returns 304 Not Modified without a body.
+
     Returns:
         JSON response containing the list of programs.
     """
+    generation = CacheGeneration.current(PROGRAMS_GENERATION)
+    cached = catalogue_cache.get(PROGRAMS_GENERATION, generation)
+    if cached is None:
+        cached = build_catalogue()
+        catalogue_cache.set(PROGRAMS_GENERATION, generation, cached)
+
+    body, etag = cached
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def build_catalogue():
+    """
+    Query and serialize every program.
+
+    Returns:
+        tuple: (JSON body, strong ETag derived from the body).
+    """
     # Retrieve all programs from the database
-    programs = HealthProgram.query.all()
-
-    # Prepare the list of program data to return
-    result = [{
-        "id": p.id,
-        "name": p.name,
-        "description": p.description,
-        "created_at": p.created_at.isoformat()  # Format datetime for response
-    } for p in programs]
-
-    # Return the list of programs
-    return jsonify(result), 200
+    programs = db.session.execute(PROGRAM_CATALOGUE.select()).all()
+
+    body = current_app.json.dumps_bytes(PROGRAM_CATALOGUE.dump_all(programs))
+    return body, hashlib.sha256(body).hexdigest()
+
+
+@programs_bp.route('/<int:program_id>/stats', methods=['GET'])
+@read_only
+@api_key_required
+def program_stats(program_id):
+    """
+    Enrollment counts of one program, by status.
+
+    Served from the program_enrollment_counts table, so the cost does not
+    depend on the number of enrollments.
+
+    Args:
+        program_id (int): The program.
+
+    Returns:
+        JSON response with the program id, total and per-status counts.
+    """
+    program = db.session.execute(
+        db.select(HealthProgram.id, HealthProgram.name).where(HealthProgram.id == program_id)
+    ).first()
+    if program is None:
+        abort(404)
+
+    counts = db.session.execute(
+        db.select(ProgramEnrollmentCount.status, ProgramEnrollmentCount.count)
+        .where(ProgramEnrollmentCount.program_id == program_id)
+    ).all()
+    return jsonify(serialize_stats(program.id, program.name, counts)), 200
+
+
+@programs_bp.route('/stats', methods=['GET'])
+@read_only
+@api_key_required
+def all_program_stats():
+    """
+    Enrollment counts by status for every program, in one query over the
+    programs and their counters.
+
+    Returns:
+        JSON response containing one stats object per program.
+    """
+    rows = db.session.execute(
+        db.select(HealthProgram.id, HealthProgram.name,
+                  ProgramEnrollmentCount.status, ProgramEnrollmentCount.count)
+        .outerjoin(ProgramEnrollmentCount, ProgramEnrollmentCount.program_id == HealthProgram.id)
+        .order_by(HealthProgram.id)
+    ).all()
+
+    programs = {}
+    for row in rows:
+        counts = programs.setdefault((row.id, row.name), [])
+        if row.status is not None:
+            counts.append((row.status, row.count))
+
+    return jsonify([
+        serialize_stats(program_id, name, counts)
+        for (program_id, name), counts in programs.items()
+    ]), 200
+
+
+@programs_bp.route('/<int:program_id>/enrollments', methods=['GET'])
+@read_only
+@api_key_required
+def list_program_enrollments(program_id):
+    """
+    List a program's enrollments, oldest first, one page at a time.
+
+    Query parameters:
+        - limit (int): Page size (default 100, max 1000).
+        - after (str): Cursor from the previous page's X-Next-Cursor header.
+        - status (str): Only enrollments with this status.
+        - enrolled_after, enrolled_before (str): ISO dates bounding enrolled_at
+          (inclusive, exclusive).
+
+    Pages are keyed on (enrolled_at, id) and served from the
+    (program_id[, status], enrolled_at, id) indexes, so each page is a
+    bounded index range scan however many enrollments the program has.
+
+    Returns:
+        JSON list of enrollments with the client's id and name.
+    """
+    try:
+        limit, after = get_page_args(parse_cursor=parse_timestamp_cursor)
+        enrolled_after = request.args.get('enrolled_after')
+        enrolled_after = datetime.fromisoformat(enrolled_after) if enrolled_after else None
+        enrolled_before = request.args.get('enrolled_before')
+        enrolled_before = datetime.fromisoformat(enrolled_before) if enrolled_before else None
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    status = request.args.get('status')
+    if status is not None and status not in ENROLLMENT_STATUSES:
+        return jsonify({"msg": f"status must be one of: {', '.join(ENROLLMENT_STATUSES)}"}), 400
+
+    if db.session.execute(
+        db.select(HealthProgram.id).where(HealthProgram.id == program_id)
+    ).first() is None:
+        abort(404)
+
+    # Only the columns we return; clients are joined by primary key per row
+    query = (
+        PROGRAM_ENROLLMENT.select()
+        .select_from(Enrollment)
+        .join(Client, Client.id == Enrollment.client_id)
+        .where(Enrollment.program_id == program_id)
+        .order_by(Enrollment.enrolled_at, Enrollment.id)
+        .limit(limit)
+    )
+    if status is not None:
+        query = query.where(Enrollment.status == status)
+    if enrolled_after is not None:
+        query = query.where(Enrollment.enrolled_at >= enrolled_after)
+    if enrolled_before is not None:
+        query = query.where(Enrollment.enrolled_at < enrolled_before)
+    if after is not None:
+        query = query.where(db.tuple_(Enrollment.enrolled_at, Enrollment.id) > after)
+
+    rows = db.session.execute(query).all()
+
+    response = jsonify(PROGRAM_ENROLLMENT.dump_all(rows))
+    return set_next_cursor(
+        response, rows, limit, key=lambda row: timestamp_cursor(row.enrolled_at, row.id)
+    ), 200
+
+
+def serialize_stats(program_id, name, counts):
+    """
+    Build the stats object of a program from its (status, count) pairs.
+    """
+    by_status = {status: count for status, count in counts if count}
+    return {
+        "program_id": program_id,
+        "name": name,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+    }
@@ -0,0 +1,187 @@
+"""
+Incremental (delta) sync for offline-capable frontends.
+
+`GET /api/sync` returns the clients, programs and enrollments created or
+changed since the caller's last sync, plus tombstones for those deleted, and
+an opaque `next` token to pass back as `since` on the following call.
+
+The token holds one (updated_at, id) keyset cursor per entity and one
+(deleted_at, id) cursor over the tombstones, so every call is a bounded range
+scan of the (updated_at, id) indexes and the payload is proportional to what
+changed, not to the size of the tables.
+
+Timestamps come from the application servers and a transaction can commit
+after rows with later timestamps are already visible (more so when reading
+from a replica). Once an entity is caught up its cursor is therefore moved
+back to SYNC_SAFETY_SECONDS before now: rows changed within that window are
+sent again on the next call, and callers must apply changes idempotently
+(upsert by id, delete by id).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
+from app import db
+from app.models import Client, Enrollment, HealthProgram, Tombstone, TOMBSTONED_MODELS
+from app.utils.auth import api_key_required
+from app.utils.replicas import read_only
+from app.utils.serializers import serializer_for
+
+# Blueprint for delta sync
+sync_bp = Blueprint('sync', __name__)
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 5000
+
+# Payload name -> (model, serializer), in the order changes are returned
+SYNCED = {
+    'clients': (Client, serializer_for(Client, 'sync')),
+    'programs': (HealthProgram, serializer_for(HealthProgram, 'sync')),
+    'enrollments': (Enrollment, serializer_for(Enrollment, 'sync')),
+}
+DELETED = 'deleted'
+
+
+def encode_sync_token(cursors):
+    """
+    Encode {entity: (datetime, id) or None} as an opaque URL-safe token.
+    """
+    payload = {
+        name: None if cursor is None else [cursor[0].isoformat(), cursor[1]]
+        for name, cursor in cursors.items()
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_sync_token(token):
+    """
+    Decode a token built by `encode_sync_token`.
+
+    Returns:
+        dict: {entity: (datetime, id) or None} for every synced entity and
+        the tombstones.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        cursors = {}
+        for name in (*SYNCED, DELETED):
+            cursor = payload[name]
+            if cursor is None:
+                cursors[name] = None
+            else:
+                timestamp, row_id = cursor
+                cursors[name] = (datetime.fromisoformat(timestamp), int(row_id))
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError("since must be a token returned by /api/sync")
+    if cursors[DELETED] is None:
+        raise ValueError("since must be a token returned by /api/sync")
+    return cursors
+
+
+def _changes(model, serializer, cursor, limit):
+    """
+    Return the next `limit` rows of `model` changed after `cursor`, oldest first.
+    """
+    query = serializer.select().order_by(model.updated_at, model.id).limit(limit)
+    if cursor is not None:
+        query = query.where(db.tuple_(model.updated_at, model.id) > cursor)
+    return db.session.execute(query).all()
+
+
+def _deletions(cursor, limit):
+    """
+    Return the next `limit` tombstones recorded after `cursor`, oldest first.
+    """
+    return db.session.execute(
+        db.select(Tombstone.id, Tombstone.entity, Tombstone.entity_id, Tombstone.deleted_at)
+        .where(db.tuple_(Tombstone.deleted_at, Tombstone.id) > cursor)
+        .order_by(Tombstone.deleted_at, Tombstone.id)
+        .limit(limit)
+    ).all()
+
+
+def _advance(rows, limit, caught_up, key):
+    """
+    Return the cursor to resume from after this page of rows.
+
+    A full page resumes after its last row; otherwise the entity is caught
+    up and resumes from the safety window before now.
+    """
+    if len(rows) == limit:
+        return key(rows[-1])
+    return caught_up
+
+
+@sync_bp.route('', methods=['GET'])
+@read_only
+@api_key_required
+def sync():
+    """
+    Return changes since the given sync token.
+
+    Query parameters:
+        - since (str): `next` token from the previous call; omit it for a
+          full initial sync.
+        - limit (int): Maximum rows per entity and for deletions
+          (default 500, max 5000).
+
+    Call again with `next` while `has_more` is true. A token older than
+    SYNC_TOKEN_MAX_AGE_DAYS may have missed pruned tombstones and is
+    rejected with 410; the caller must discard its data and sync from scratch.
+
+    Returns:
+        JSON object with the changed clients, programs and enrollments, the
+        ids deleted per entity, `next` and `has_more`.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SYNC_LIMIT))
+        since = request.args.get('since')
+        cursors = decode_sync_token(since) if since else None
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    if limit < 1:
+        return jsonify({"msg": "limit must be a positive integer"}), 400
+    limit = min(limit, MAX_SYNC_LIMIT)
+
+    config = current_app.config
+    now = datetime.utcnow()
+    caught_up = (now - timedelta(seconds=config['SYNC_SAFETY_SECONDS']), 0)
+
+    if cursors is None:
+        # Everything that exists now is sent, so only later deletions matter
+        cursors = dict.fromkeys(SYNCED)
+        cursors[DELETED] = caught_up
+    elif cursors[DELETED][0] < now - timedelta(days=config['SYNC_TOKEN_MAX_AGE_DAYS']):
+        return jsonify({"msg": "Sync token expired; resync from scratch"}), 410
+
+    body = {}
+    next_cursors = {}
+    has_more = False
+    for name, (model, serializer) in SYNCED.items():
+        rows = _changes(model, serializer, cursors[name], limit)
+        body[name] = serializer.dump_all(rows)
+        next_cursors[name] = _advance(
+            rows, limit, caught_up, key=lambda row: (row.updated_at, row.id)
+        )
+        has_more = has_more or len(rows) == limit
+
+    tombstones = _deletions(cursors[DELETED], limit)
+    deleted = {name: [] for name in TOMBSTONED_MODELS}
+    for tombstone in tombstones:
+        deleted[tombstone.entity].append(tombstone.entity_id)
+    body[DELETED] = deleted
+    next_cursors[DELETED] = _advance(
+        tombstones, limit, caught_up, key=lambda row: (row.deleted_at, row.id)
+    )
+    has_more = has_more or len(tombstones) == limit
+
+    body['next'] = encode_sync_token(next_cursors)
+    body['has_more'] = has_more
+    return jsonify(body), 200
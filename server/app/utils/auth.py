@@ -1,27 +1,92 @@
 # app/utils/auth.py
 
+from collections import namedtuple
 from functools import wraps
 from flask import request, jsonify
-from app.models import APIKey
+from app import db, api_key_cache
+from app.models import APIKey, Doctor
+from app.utils.tokens import decode_access_token, tokens_enabled
+
+# Detached, read-only view of the authenticated Doctor that is safe to cache
+# across requests (unlike an ORM instance bound to a finished session).
+DoctorSnapshot = namedtuple('DoctorSnapshot', ['id', 'name', 'email', 'is_admin'])
+
+
+def resolve_api_key(key):
+    """
+    Resolve an API key to a DoctorSnapshot, or None if the key is unknown
+    or revoked. Active keys are served from the per-worker cache and fall
+    back to a single joined query on a miss.
+    """
+    doctor = api_key_cache.get(key)
+    if doctor is not None:
+        return doctor
+
+    row = db.session.query(
+        Doctor.id, Doctor.name, Doctor.email, Doctor.is_admin
+    ).join(APIKey, APIKey.doctor_id == Doctor.id).filter(
+        APIKey.key == key, APIKey.is_active == True  # noqa: E712
+    ).first()
+    if not row:
+        return None
+
+    doctor = DoctorSnapshot(*row)
+    api_key_cache.set(key, doctor)
+    return doctor
+
+
+def invalidate_api_keys(*keys):
+    """
+    Drop the given API keys from the cache, e.g. right after revoking them.
+    """
+    api_key_cache.delete(*keys)
+
+
+def authenticate():
+    """
+    Identify the caller from an access token (`Authorization: Bearer ...`),
+    verified without touching the database, or else from the API-KEY header.
+
+    On success attaches `request.doctor` and, for API key requests,
+    `request.api_key`; for token requests, `request.token_claims`.
+
+    Returns:
+        tuple: (DoctorSnapshot, None) on success, or (None, error response).
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token and tokens_enabled():
+        claims = decode_access_token(token)
+        if not claims:
+            return None, (jsonify({"msg": "Invalid, expired or revoked access token"}), 401)
+        request.token_claims = claims
+        request.doctor = DoctorSnapshot(int(claims['sub']), claims.get('name'),
+                                        claims.get('email'), claims.get('adm', False))
+        return request.doctor, None
+
+    key = request.headers.get('API-KEY')
+    if not key:
+        return None, (jsonify({"msg": "API key required"}), 401)
+
+    doctor = resolve_api_key(key)
+    if not doctor:
+        return None, (jsonify({"msg": "Invalid or revoked API key"}), 403)
+
+    # Expose the authenticated Doctor on the request
+    request.api_key = key
+    request.doctor = doctor
+    return doctor, None
+
 
 def api_key_required(f):
     """
-    Decorator to enforce that a valid, active API key is provided
-    in the API-KEY header.  On success, attaches `request.doctor`.
+    Decorator to enforce that a valid access token or a valid, active API key
+    is provided. On success, attaches `request.doctor`.
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-    
-        key = request.headers.get('API-KEY')
-        if not key:
-            return jsonify({"msg": "API key required"}), 401
-
-        record = APIKey.query.filter_by(key=key, is_active=True).first()
-        if not record:
-            return jsonify({"msg": "Invalid or revoked API key"}), 403
-
-        # Expose the authenticated Doctor on the request
-        request.doctor = record.doctor
+        doctor, error = authenticate()
+        if error:
+            return error
         return f(*args, **kwargs)
 
     return decorated
@@ -29,21 +94,14 @@ def api_key_required(f):
 def super_admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        # First validate API key just like a normal decorator
-        key = request.headers.get('API-KEY')
-        if not key:
-            return jsonify({"msg": "API key required"}), 401
-        
-        record = APIKey.query.filter_by(key=key, is_active=True).first()
-        if not record:
-            return jsonify({"msg": "Invalid or revoked API key"}), 403
+        # First authenticate just like a normal decorator
+        doctor, error = authenticate()
+        if error:
+            return error
 
         # Now check the doctor’s “is_admin” flag (or however you mark superadmins)
-        doctor = record.doctor
         if not getattr(doctor, 'is_admin', False):
             return jsonify({"msg": "Super-admin privileges required"}), 403
 
-        # Expose the authenticated Doctor on the request
-        request.doctor = doctor
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,82 @@
+"""
+Helpers for set-based writes.
+
+These build multi-row INSERT statements that skip rows violating a unique
+constraint (`ON CONFLICT DO NOTHING`), or add to a counter on the existing
+row (`ON CONFLICT DO UPDATE`), on databases that support it, so bulk
+endpoints do not need a per-row existence check.
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+# Dialects whose insert() construct supports on_conflict_do_nothing()
+_CONFLICT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def supports_insert_ignore():
+    """
+    Return True if the bound database can skip conflicting rows natively.
+    """
+    return db.engine.dialect.name in _CONFLICT_INSERTS
+
+
+def insert_ignore(model, conflict_columns):
+    """
+    Build an INSERT for `model` that silently skips rows conflicting on
+    `conflict_columns`.
+
+    Args:
+        model: The mapped model class to insert into.
+        conflict_columns (list): Column names of the unique constraint.
+
+    Returns:
+        Insert: The statement, to be executed with a list of parameter dicts.
+
+    Raises:
+        NotImplementedError: If the database has no ON CONFLICT support;
+            check `supports_insert_ignore()` first.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in _CONFLICT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return _CONFLICT_INSERTS[dialect](model).on_conflict_do_nothing(
+        index_elements=conflict_columns
+    )
+
+
+def insert_or_add(model, conflict_columns, counter):
+    """
+    Build an INSERT for `model` that, for rows conflicting on
+    `conflict_columns`, adds the new row's `counter` value to the existing
+    row's instead (an atomic upsert-increment).
+
+    Raises:
+        NotImplementedError: If the database has no ON CONFLICT support;
+            check `supports_insert_ignore()` first.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in _CONFLICT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    stmt = _CONFLICT_INSERTS[dialect](model)
+    return stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={counter: getattr(model, counter) + stmt.excluded[counter]},
+    )
+
+
+def chunked(items, size):
+    """
+    Yield successive lists of at most `size` items from `items`.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
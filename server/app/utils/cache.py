@@ -0,0 +1,155 @@
+"""
+In-process caching helpers.
+
+This module provides a small, thread-safe TTL/LRU cache used to keep hot
+lookups (such as API key resolution) out of the database. Each gunicorn
+worker holds its own instance, so entries must be safe to serve slightly
+stale for at most the configured TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A bounded mapping whose entries expire after `ttl` seconds and whose
+    least recently used entries are evicted once `maxsize` is reached.
+
+    The cache follows the Flask extension pattern: create it at module level
+    and call `init_app` to read its size and TTL from the app config.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, size_key=None, ttl_key=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.size_key = size_key
+        self.ttl_key = ttl_key
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configure the cache from the application config.
+
+        Args:
+            app (Flask): The application whose config holds the size and TTL.
+        """
+        if self.size_key:
+            self.maxsize = app.config.get(self.size_key, self.maxsize)
+        if self.ttl_key:
+            self.ttl = app.config.get(self.ttl_key, self.ttl)
+        self.clear()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for `key`, or `default` if missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """
+        Store `value` under `key`, evicting the least recently used entry if full.
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        """
+        Remove the given keys from the cache if present.
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop all entries and reset the hit/miss counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return a snapshot of the cache counters.
+
+        Returns:
+            dict: size, maxsize, ttl, hits and misses.
+        """
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class VersionedCache:
+    """
+    Holds one value per key tagged with the generation it was built from.
+
+    A lookup only succeeds if the caller's current generation matches, so a
+    worker notices that another worker changed the underlying data as soon as
+    the shared generation counter moves.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation):
+        """
+        Return the value cached for `key` at `generation`, or None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, generation, value):
+        """
+        Cache `value` for `key` as built from `generation`.
+        """
+        with self._lock:
+            self._data[key] = (generation, value)
+
+    def clear(self):
+        """
+        Drop all entries and reset the hit/miss counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,201 @@
+"""
+Bulk client registration.
+
+Records are read lazily from CSV or NDJSON streams (or any iterable of dicts),
+validated one at a time and written in batches, so memory use depends on the
+batch size rather than on the size of the file. Rows that fail validation are
+reported back instead of aborting the import.
+
+On PostgreSQL each batch is written with COPY; other databases use a single
+executemany INSERT per batch.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from app import db
+from app.models import Client
+from app.utils.phonetic import soundex
+
+# Columns written for every imported client, in COPY order
+IMPORT_COLUMNS = (
+    'first_name', 'last_name', 'date_of_birth', 'gender',
+    'contact_info', 'registered_at', 'updated_at', 'created_by_id',
+    'first_name_code', 'last_name_code',
+)
+
+# At most this many row errors are returned; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_client(data):
+    """
+    Validate a client record and convert it to column values.
+
+    Args:
+        data (dict): Raw client fields as sent by the caller.
+
+    Returns:
+        dict: first_name, last_name, date_of_birth, gender and contact_info.
+
+    Raises:
+        ValueError: If the record is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Client record must be an object")
+
+    first_name = data.get('first_name')
+    last_name = data.get('last_name')
+    if not (first_name and last_name):
+        raise ValueError("first_name and last_name required")
+
+    # Parse the client's date of birth (DOB)
+    raw_dob = data.get('date_of_birth')
+    try:
+        dob = datetime.strptime(raw_dob, '%Y-%m-%d').date() if raw_dob else None
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date_of_birth format")
+
+    gender = data.get('gender') or None
+    for field, value, length in (('first_name', first_name, 120),
+                                 ('last_name', last_name, 120),
+                                 ('gender', gender, 10)):
+        if value is not None and (not isinstance(value, str) or len(value) > length):
+            raise ValueError(f"{field} must be a string of at most {length} characters")
+
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "date_of_birth": dob,
+        "gender": gender,
+        "contact_info": data.get('contact_info') or None,
+    }
+
+
+def iter_records(stream, fmt):
+    """
+    Lazily yield records from a text stream.
+
+    Args:
+        stream: A text file-like object.
+        fmt (str): 'csv' (with a header row) or 'ndjson'.
+
+    Yields:
+        dict or ValueError: One item per data row; rows that cannot be
+        decoded are yielded as the ValueError describing the problem.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield ValueError("Invalid JSON")
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _copy_rows(rows):
+    """
+    Write a batch with PostgreSQL COPY on the session's connection.
+
+    COPY runs on the raw DBAPI cursor, so its errors are wrapped in the
+    matching DBAPIError subclass, as SQLAlchemy does for statements it
+    executes itself.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if row[c] is None else row[c] for c in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    statement = f"COPY clients ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    dialect = db.engine.dialect
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, buffer)
+    except dialect.dbapi.Error as e:
+        raise DBAPIError.instance(statement, None, e, dialect.dbapi.Error, dialect=dialect) from e
+    finally:
+        cursor.close()
+
+
+def _write_batch(rows):
+    """
+    Insert one batch of parsed clients and commit it.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        _copy_rows(rows)
+    else:
+        db.session.execute(Client.__table__.insert(), rows)
+    db.session.commit()
+
+
+def import_clients(records, created_by_id, batch_size):
+    """
+    Validate and insert clients in batches of `batch_size`.
+
+    Each batch is committed on its own; if the database rejects a batch,
+    it is rolled back and its rows are reported as failed while the import
+    carries on with the next batch.
+
+    Args:
+        records (iterable): Raw client dicts (or ValueErrors, see iter_records).
+        created_by_id (int): The doctor recorded as creator of every client.
+        batch_size (int): Number of rows per INSERT/COPY.
+
+    Returns:
+        dict: imported and failed counts plus the first row errors, each
+        as {"row": <1-based row number>, "msg": <reason>}.
+    """
+    imported = failed = 0
+    errors = []
+    batch, batch_rows = [], []
+
+    def record_error(row_number, msg):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "msg": msg})
+
+    def flush():
+        nonlocal imported
+        try:
+            _write_batch(batch)
+            imported += len(batch)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            reason = str(getattr(e, 'orig', e)).strip().splitlines()[0]
+            for row_number in batch_rows:
+                record_error(row_number, f"Batch rejected by database: {reason}")
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, record in enumerate(records, start=1):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            row = parse_client(record)
+        except ValueError as e:
+            record_error(row_number, str(e))
+            continue
+
+        row["registered_at"] = row["updated_at"] = datetime.utcnow()
+        row["created_by_id"] = created_by_id
+        # COPY bypasses column defaults, so the blocking keys are set here
+        row["first_name_code"] = soundex(row["first_name"])
+        row["last_name_code"] = soundex(row["last_name"])
+        batch.append(row)
+        batch_rows.append(row_number)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return {"imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,141 @@
+"""
+Response compression.
+
+`Compression` negotiates a Content-Encoding from the request's
+Accept-Encoding header: brotli when the optional `brotli` package is
+installed and the client accepts it, gzip otherwise. Only text-like
+responses are compressed:
+    - buffered responses of at least COMPRESS_MIN_SIZE bytes are compressed
+      in one pass, replacing the original body;
+    - streamed responses (NDJSON exports, for instance) are compressed
+      chunk by chunk as they are sent and flushed every
+      COMPRESS_STREAM_FLUSH bytes of input, so nothing is buffered in full
+      and slow clients still receive data progressively.
+"""
+
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+
+class _GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class Compression:
+    """
+    Flask extension compressing responses; configured by COMPRESS_* settings.
+    """
+
+    def init_app(self, app):
+        app.extensions['compression'] = self
+        if app.config['COMPRESS_ENABLED']:
+            app.after_request(self._compress_response)
+
+    def _encoder(self, config):
+        """
+        Return an encoder for the best encoding the client accepts, or None.
+        """
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return _BrotliEncoder(config['COMPRESS_BR_LEVEL'])
+        if accepted['gzip']:
+            return _GzipEncoder(config['COMPRESS_LEVEL'])
+        return None
+
+    def _compress_response(self, response):
+        config = current_app.config
+        if (response.mimetype not in config['COMPRESS_MIMETYPES']
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        # The body depends on Accept-Encoding whether or not we compress this one
+        response.vary.add('Accept-Encoding')
+        if request.method == 'HEAD':
+            return response
+
+        if response.is_streamed:
+            encoder = self._encoder(config)
+            if encoder is None:
+                return response
+            response.response = _compress_stream(
+                response.response, encoder, config['COMPRESS_STREAM_FLUSH']
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            if (response.content_length or 0) < config['COMPRESS_MIN_SIZE']:
+                return response
+            encoder = self._encoder(config)
+            if encoder is None:
+                return response
+            response.set_data(encoder.compress(response.get_data()) + encoder.finish())
+
+        response.headers['Content-Encoding'] = encoder.name
+        # The encoded bytes differ per encoding: a strong validator would be
+        # wrong, a weak one still matches If-None-Match (make_conditional)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _compress_stream(chunks, encoder, flush_every):
+    """
+    Compress an iterable of body chunks lazily, flushing a complete block to
+    the client after every `flush_every` bytes of input. Closes the original
+    iterable (e.g. a stream_with_context generator) when done.
+    """
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_every:
+                data += encoder.flush()
+                pending = 0
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+compression = Compression()
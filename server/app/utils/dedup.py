@@ -0,0 +1,298 @@
+"""
+Duplicate-patient detection.
+
+Comparing every client with every other is O(n²), so candidates are only
+generated within blocks of clients sharing a blocking key:
+    - Soundex of the last name + date of birth,
+    - Soundex of the first name + date of birth,
+    - the pair of name codes in either order (same or swapped names).
+The codes are stored on `clients` (first_name_code / last_name_code) and
+indexed with the date of birth, so the blocks of a new registration are a
+few index lookups, and the batch job walks each blocking key in sorted order.
+
+Candidates are scored in [0, 1] from the Jaro-Winkler similarity of the
+names (also tried swapped), date of birth (exact, or one typo / day and
+month transposed), gender and contact details; pairs scoring at least
+DEDUP_THRESHOLD are reported as possible duplicates.
+"""
+
+import itertools
+from collections import namedtuple
+from sqlalchemy import and_, case, func, or_, select
+from app import db
+from app.models import Client
+from app.utils.phonetic import fold, soundex
+
+# Normalized fields compared between two clients
+Profile = namedtuple('Profile', 'id first last dob gender contact')  # dob as 'YYYYMMDD'
+
+COMPARE_COLUMNS = (
+    Client.id, Client.first_name, Client.last_name, Client.date_of_birth,
+    Client.gender, Client.contact_info,
+)
+
+# Weights of the score components; names dominate, so twins (same surname
+# and birth date, different first names) stay below the default threshold
+FIRST_NAME_WEIGHT = 0.4
+LAST_NAME_WEIGHT = 0.3
+DOB_WEIGHT = 0.2
+GENDER_WEIGHT = 0.1
+CONTACT_BONUS = 0.1
+
+# Phone numbers are compared on their national significant number
+PHONE_DIGITS = 9
+
+# Blocks larger than the all-pairs limit compare each client with this many
+# neighbours in name order instead (sorted neighbourhood)
+NEIGHBOURHOOD_WINDOW = 50
+
+
+def jaro_winkler(a, b):
+    """
+    Jaro-Winkler similarity of two strings, in [0, 1].
+    """
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+
+    window = max(max(la, lb) // 2 - 1, 0)
+    a_matched = [False] * la
+    b_matched = [False] * lb
+    matches = 0
+    for i, c in enumerate(a):
+        for j in range(max(0, i - window), min(i + window + 1, lb)):
+            if not b_matched[j] and b[j] == c:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    half_transpositions = 0
+    k = 0
+    for i in range(la):
+        if a_matched[i]:
+            while not b_matched[k]:
+                k += 1
+            if a[i] != b[k]:
+                half_transpositions += 1
+            k += 1
+
+    jaro = (matches / la + matches / lb + (matches - half_transpositions / 2) / matches) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _normalize_contact(value):
+    """
+    Reduce contact details to the last PHONE_DIGITS digits of a phone number
+    (dropping any country code or trunk prefix), or else to folded text.
+    """
+    if not value:
+        return None
+    digits = ''.join(c for c in value if c.isdigit())
+    if len(digits) >= 7:
+        return digits[-PHONE_DIGITS:]
+    return fold(value) or None
+
+
+def profile(client_id, first_name, last_name, date_of_birth=None, gender=None, contact_info=None):
+    """
+    Build the normalized Profile compared by `score`.
+    """
+    return Profile(
+        client_id, fold(first_name), fold(last_name),
+        date_of_birth.strftime('%Y%m%d') if date_of_birth else None,
+        fold(gender)[:1] or None, _normalize_contact(contact_info),
+    )
+
+
+def _dob_score(a, b):
+    if a is None or b is None:
+        return 0.5
+    if a == b:
+        return 1.0
+    if a[:4] == b[:4] and a[4:6] == b[6:] and a[6:] == b[4:6]:
+        return 0.5  # Day and month swapped
+    if sum(x != y for x, y in zip(a, b)) == 1:
+        return 0.5  # One mistyped digit
+    return 0.0
+
+
+def score(a, b, threshold=0.0):
+    """
+    Likelihood in [0, 1] that two Profiles are the same patient.
+
+    Returns 0.0 without comparing the names when the other fields already
+    keep the pair below `threshold` (e.g. different birth dates and no shared
+    phone number): large blocks of common names are mostly such pairs.
+    """
+    if a.gender is None or b.gender is None:
+        gender = 0.5
+    else:
+        gender = float(a.gender == b.gender)
+    total = DOB_WEIGHT * _dob_score(a.dob, b.dob) + GENDER_WEIGHT * gender
+    if a.contact is not None and a.contact == b.contact:
+        total += CONTACT_BONUS
+    if total + FIRST_NAME_WEIGHT + LAST_NAME_WEIGHT < threshold:
+        return 0.0
+
+    total += max(
+        FIRST_NAME_WEIGHT * jaro_winkler(a.first, b.first) + LAST_NAME_WEIGHT * jaro_winkler(a.last, b.last),
+        FIRST_NAME_WEIGHT * jaro_winkler(a.first, b.last) + LAST_NAME_WEIGHT * jaro_winkler(a.last, b.first),
+    )
+    return round(min(total, 1.0), 3)
+
+
+def find_possible_duplicates(first_name, last_name, date_of_birth=None, gender=None, contact_info=None,
+                             threshold=0.85, max_candidates=200, limit=10):
+    """
+    Find existing clients that may be the patient described by the arguments.
+
+    Candidates come from at most two indexed queries (the date-of-birth
+    blocks, then the name blocks), each capped at `max_candidates` rows:
+    same birth date first, then same name codes, same gender, and the most
+    recently registered.
+
+    Returns:
+        list: Up to `limit` (score, row) pairs, best first, where row has
+        the COMPARE_COLUMNS of the existing client.
+    """
+    first_code, last_code = soundex(first_name), soundex(last_name)
+    if not (first_code and last_code):
+        return []
+
+    blocks = []
+    if date_of_birth is not None:
+        blocks.append(or_(
+            and_(Client.last_name_code == last_code, Client.date_of_birth == date_of_birth),
+            and_(Client.first_name_code == first_code, Client.date_of_birth == date_of_birth),
+        ))
+    blocks.append(or_(
+        and_(Client.first_name_code == first_code, Client.last_name_code == last_code),
+        and_(Client.first_name_code == last_code, Client.last_name_code == first_code),
+    ))
+
+    # A block can hold more than max_candidates rows (a common name, or a
+    # placeholder birth date), so the likeliest matches are read first
+    likelihood = [case(
+        (or_(
+            and_(Client.first_name_code == first_code, Client.last_name_code == last_code),
+            and_(Client.first_name_code == last_code, Client.last_name_code == first_code),
+        ), 0),
+        else_=1,
+    )]
+    if date_of_birth is not None:
+        likelihood.insert(0, case((Client.date_of_birth == date_of_birth, 0), else_=1))
+    if gender:
+        likelihood.append(case((func.lower(Client.gender) == gender.lower(), 0), else_=1))
+
+    candidates = {}
+    for condition in blocks:
+        rows = db.session.execute(
+            select(*COMPARE_COLUMNS)
+            .where(condition)
+            .order_by(*likelihood, Client.id.desc())
+            .limit(max_candidates)
+        )
+        for row in rows:
+            candidates.setdefault(row.id, row)
+
+    probe = profile(None, first_name, last_name, date_of_birth, gender, contact_info)
+    scored = [(score(probe, profile(*row), threshold), row) for row in candidates.values()]
+    matches = sorted(
+        (pair for pair in scored if pair[0] >= threshold), key=lambda pair: (-pair[0], pair[1].id)
+    )
+    return matches[:limit]
+
+
+def _blocking_keys():
+    """
+    Column tuples the batch job groups clients by.
+    """
+    in_order = Client.first_name_code <= Client.last_name_code
+    return (
+        (Client.last_name_code, Client.date_of_birth),
+        (Client.first_name_code, Client.date_of_birth),
+        (
+            case((in_order, Client.first_name_code), else_=Client.last_name_code),
+            case((in_order, Client.last_name_code), else_=Client.first_name_code),
+        ),
+    )
+
+
+def _block_pairs(block, block_size):
+    """
+    Yield the pairs of Profiles in one block to compare.
+    """
+    if len(block) <= block_size:
+        yield from itertools.combinations(block, 2)
+        return
+    block = sorted(block, key=lambda p: (p.last, p.first, p.id))
+    for i, a in enumerate(block):
+        for b in block[i + 1:i + 1 + NEIGHBOURHOOD_WINDOW]:
+            yield a, b
+
+
+def find_duplicate_clusters(threshold=0.85, block_size=500, batch_size=5000):
+    """
+    Group every client into clusters of likely duplicates.
+
+    Each blocking key is read in sorted order from a server-side cursor, so
+    only one block is held in memory at a time; pairs scoring at least
+    `threshold` are merged into clusters with a union-find.
+
+    Returns:
+        tuple: (clusters, compared) where clusters is a list of
+        {"client_ids": [...], "pairs": [[id, id, score], ...]} dicts,
+        largest first, and compared the number of pairs scored.
+    """
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    matches = {}
+    compared = 0
+    for key in _blocking_keys():
+        rows = db.session.execute(
+            select(*COMPARE_COLUMNS, *key)
+            .order_by(*key, Client.id)
+            .execution_options(yield_per=batch_size)
+        )
+        width = len(COMPARE_COLUMNS)
+        for block_key, group in itertools.groupby(rows, key=lambda row: tuple(row[width:])):
+            if any(part in (None, '') for part in block_key):
+                continue
+            block = [profile(*row[:width]) for row in group]
+            for a, b in _block_pairs(block, block_size):
+                pair = (a.id, b.id) if a.id < b.id else (b.id, a.id)
+                if pair in matches:
+                    continue
+                compared += 1
+                similarity = score(a, b, threshold)
+                if similarity >= threshold:
+                    matches[pair] = similarity
+                    parent[find(pair[0])] = find(pair[1])
+
+    clusters = {}
+    for (a, b), similarity in matches.items():
+        cluster = clusters.setdefault(find(a), {"client_ids": set(), "pairs": []})
+        cluster["client_ids"].update((a, b))
+        cluster["pairs"].append([a, b, similarity])
+
+    result = [
+        {"client_ids": sorted(c["client_ids"]), "pairs": sorted(c["pairs"])}
+        for c in clusters.values()
+    ]
+    result.sort(key=lambda c: (-len(c["client_ids"]), c["client_ids"][0]))
+    return result, compared
@@ -0,0 +1,277 @@
+"""
+Full-registry exports for reporting.
+
+Each dataset (clients, programs, enrollments joined to their client and
+program) is read in primary-key order from a server-side cursor
+(`yield_per`), EXPORT_BATCH_SIZE rows at a time, and encoded batch by batch
+as CSV, NDJSON or, when the optional `pyarrow` package is installed,
+Parquet (one row group per batch). Memory use is bounded by one batch
+however large the registry is.
+
+Every row starts with its dataset's id, and exports take an `after` id, so
+an interrupted export is resumed from the last id received.
+"""
+
+import csv
+import io
+import json
+from datetime import date
+from sqlalchemy import Boolean, Date, DateTime, Integer
+from app import db
+from app.models import Client, Enrollment, HealthProgram
+from app.utils.serializers import serializer_for
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional; Parquet exports are unavailable without it
+    pyarrow = None
+
+# Dataset name -> (serializer, primary key column, joined tables)
+DATASETS = {
+    'clients': (serializer_for(Client, 'export'), Client.id, ()),
+    'programs': (serializer_for(HealthProgram, 'export'), HealthProgram.id, ()),
+    'enrollments': (
+        serializer_for(Enrollment, 'export'),
+        Enrollment.id,
+        (
+            (Client, Client.id == Enrollment.client_id),
+            (HealthProgram, HealthProgram.id == Enrollment.program_id),
+        ),
+    ),
+}
+
+# Format name -> (mimetype, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def available_formats():
+    """
+    Return the export formats supported by this installation.
+    """
+    return [name for name in FORMATS if name != 'parquet' or pyarrow is not None]
+
+
+def iter_batches(dataset, after=None, batch_size=1000):
+    """
+    Yield lists of rows of `dataset`, in id order, from a server-side cursor.
+
+    Args:
+        dataset (str): A key of DATASETS.
+        after (int): Only rows with a greater id (to resume an export).
+        batch_size (int): Rows fetched per round trip.
+    """
+    serializer, key, joins = DATASETS[dataset]
+    query = serializer.select().select_from(key.table)
+    for table, onclause in joins:
+        query = query.join(table, onclause)
+    if after is not None:
+        query = query.where(key > after)
+    query = query.order_by(key).execution_options(yield_per=batch_size)
+
+    for batch in db.session.execute(query).partitions():
+        yield batch
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(keys, batches, header=True):
+    """
+    Encode row batches as CSV, one chunk of bytes per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(keys)
+    for batch in batches:
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_ndjson(keys, batches, dumps):
+    """
+    Encode row batches as NDJSON, one chunk of bytes per batch.
+
+    Args:
+        dumps (callable): Serializes one dict to JSON bytes (e.g. the app's
+            `json.dumps_bytes`).
+    """
+    for batch in batches:
+        yield b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file collecting what the Parquet writer produces, so it can
+    be handed out chunk by chunk instead of building the whole file.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp('us')
+    if isinstance(column.type, Date):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+def encode_parquet(keys, columns, batches):
+    """
+    Encode row batches as a Parquet file, one row group per batch.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+    schema = pyarrow.schema([(key, _arrow_type(c)) for key, c in zip(keys, columns)])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for batch in batches:
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(values, type=field.type)
+                 for values, field in zip(zip(*batch), schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export(dataset, fmt, after=None, batch_size=1000, dumps=None, header=True):
+    """
+    Stream `dataset` in format `fmt` as chunks of bytes.
+
+    Args:
+        dataset (str): A key of DATASETS.
+        fmt (str): A key of FORMATS.
+        after (int): Resume after this id.
+        batch_size (int): Rows per server-side cursor fetch and output chunk.
+        dumps (callable): JSON encoder for NDJSON (defaults to compact
+            stdlib json).
+        header (bool): Write the CSV header row (off when appending to a
+            partial export).
+    """
+    serializer = DATASETS[dataset][0]
+    batches = iter_batches(dataset, after, batch_size)
+    if fmt == 'csv':
+        return encode_csv(serializer.keys, batches, header=header)
+    if fmt == 'ndjson':
+        if dumps is None:
+            def dumps(obj):
+                return json.dumps(obj, default=_csv_value, separators=(',', ':')).encode('utf-8')
+        return encode_ndjson(serializer.keys, batches, dumps)
+    return encode_parquet(serializer.keys, serializer.columns, batches)
+
+
+def last_exported_id(path, fmt):
+    """
+    Return the id of the last complete row of a partial CSV or NDJSON
+    export and truncate anything written after it, so the export can be
+    resumed by appending.
+
+    Returns:
+        int: The last id, or None if the file holds no complete row.
+    """
+    with open(path, 'rb+') as f:
+        if fmt == 'csv':
+            end, last = _last_csv_record(f)
+        else:
+            end, last = _last_ndjson_record(f)
+        f.truncate(end)
+    return last
+
+
+def _last_csv_record(f):
+    """
+    Scan a CSV export for its last complete record; quoted fields may span
+    lines, so the file is parsed from the start, one line in memory at a time.
+
+    Returns:
+        tuple: (byte offset after the last record, its id or None)
+    """
+    consumed = 0
+
+    def lines():
+        nonlocal consumed
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # Cut off mid-line
+            consumed += len(line)
+            yield line.decode('utf-8')
+
+    end, last = 0, None
+    # Strict, so a quoted field cut off at the end raises instead of being
+    # returned as a complete record
+    reader = csv.reader(lines(), strict=True)
+    try:
+        next(reader)  # header
+        end = consumed
+        for record in reader:
+            last, end = int(record[0]), consumed
+    except (StopIteration, csv.Error):
+        pass  # Empty file, or a quoted field cut off mid-record
+    return end, last
+
+
+def _last_ndjson_record(f):
+    """
+    Find the last complete line of an NDJSON export by reading backwards
+    from the end of the file.
+
+    Returns:
+        tuple: (byte offset after the last line, its id or None)
+    """
+    size = f.seek(0, io.SEEK_END)
+    tail = b""
+    position = size
+    while position > 0:
+        step = min(64 * 1024, position)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        end = tail.rfind(b"\n")
+        if end != -1 and (tail.rfind(b"\n", 0, end) != -1 or position == 0):
+            start = tail.rfind(b"\n", 0, end) + 1
+            return position + end + 1, int(json.loads(tail[start:end])['id'])
+    return 0, None
@@ -0,0 +1,88 @@
+"""
+JSON provider used for every response and request body.
+
+`FastJSONProvider` encodes with orjson when it is installed (and
+JSON_USE_ORJSON is on) and falls back to the standard library otherwise.
+Both paths produce the same output: compact separators, keys in insertion
+order, and dates/datetimes as ISO 8601 strings, so routes can hand rows
+with raw date values straight to `jsonify` instead of calling isoformat()
+on every field.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(o):
+    """
+    Convert values neither encoder handles natively.
+    """
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, with a stdlib fallback.
+    """
+
+    sort_keys = False  # Insertion order is the documented field order, and cheaper
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_USE_ORJSON', True)
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps_bytes(self, obj):
+        """
+        Serialize `obj` to UTF-8 encoded JSON.
+        """
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if self._indent():
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=_default, option=option)
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers beyond 64 bits; let the stdlib try
+        return self.dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self._indent():
+            kwargs.setdefault('indent', 2)
+        else:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,262 @@
+"""
+Request and database instrumentation.
+
+`Metrics` hooks into every request and every SQL statement to record:
+    - per-endpoint latency histograms and request counts by status code,
+    - per-request SQL statement count and total database time,
+    - response sizes,
+    - slow statements and slow requests (logged as warnings).
+
+Each response carries a `Server-Timing` header (app and db time, statement
+count) and `/metrics` exposes the counters in the Prometheus text format.
+Counters are kept per worker process, like the other in-process caches.
+"""
+
+import hmac
+import logging
+import threading
+import time
+from flask import Response, abort, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the statements-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative Prometheus-style histogram.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    """
+    Flask extension collecting request and SQL metrics for this worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Drop every recorded value.
+        """
+        with self._lock:
+            self.requests = {}          # (endpoint, method, status) -> count
+            self.latency = {}           # endpoint -> Histogram of seconds
+            self.queries = {}           # endpoint -> Histogram of statements per request
+            self.db_seconds = {}        # endpoint -> total seconds spent in the database
+            self.response_bytes = {}    # endpoint -> total response bytes
+            self.slow_queries = 0
+
+    def init_app(self, app):
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        if app.config['METRICS_TOKEN'] or not app.config['METRICS_REQUIRE_TOKEN']:
+            app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        else:
+            # Traffic, SQL and pool figures must not be public in production
+            logger.warning("METRICS_TOKEN is not set; /metrics is disabled")
+        register_collector(app, _runtime_metrics)
+        _listen_for_queries()
+
+    # Request hooks
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        queries = g.pop('metrics_queries', 0)
+        db_seconds = g.pop('metrics_db_seconds', 0.0)
+        endpoint = request.endpoint or 'unmatched'
+        size = response.calculate_content_length() or 0
+
+        with self._lock:
+            key = (endpoint, request.method, response.status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            self.queries.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS)).observe(queries)
+            self.db_seconds[endpoint] = self.db_seconds.get(endpoint, 0.0) + db_seconds
+            self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + size
+
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.2f}, db;dur={db_seconds * 1000:.2f};desc="{queries} queries"'
+        )
+
+        if elapsed * 1000 >= current_app.config['SLOW_REQUEST_MS']:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries, %.1f ms in db",
+                request.method, request.path, elapsed * 1000, queries, db_seconds * 1000
+            )
+        return response
+
+    def record_query(self, statement, seconds):
+        """
+        Account one executed statement to the current request, if any.
+        """
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_queries += 1
+            g.metrics_db_seconds += seconds
+
+        if seconds * 1000 >= current_app.config['SLOW_QUERY_MS']:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms): %s", seconds * 1000, statement)
+
+    # Exposition
+
+    def _metrics_view(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            # Constant-time comparison; bytes, since the header may not be ASCII
+            provided = request.headers.get('Authorization', '').encode('utf-8')
+            if not hmac.compare_digest(provided, f'Bearer {token}'.encode('utf-8')):
+                abort(401)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP http_requests_total Requests handled, by endpoint, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}'
+                )
+
+            _render_histograms(lines, 'http_request_duration_seconds',
+                               'Request latency in seconds.', self.latency)
+            _render_histograms(lines, 'db_queries_per_request',
+                               'SQL statements executed per request.', self.queries)
+
+            lines += [
+                '# HELP db_time_seconds_total Time spent executing SQL, by endpoint.',
+                '# TYPE db_time_seconds_total counter',
+            ]
+            for endpoint, seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_time_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            lines += [
+                '# HELP http_response_bytes_total Response body bytes sent, by endpoint.',
+                '# TYPE http_response_bytes_total counter',
+            ]
+            for endpoint, size in sorted(self.response_bytes.items()):
+                lines.append(f'http_response_bytes_total{{endpoint="{endpoint}"}} {size}')
+
+            lines += [
+                '# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.',
+                '# TYPE db_slow_queries_total counter',
+                f'db_slow_queries_total {self.slow_queries}',
+            ]
+
+        for collector in current_app.extensions.get('metrics_collectors', []):
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(lines, name, help_text, histograms):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for endpoint, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+
+def register_collector(app, collector):
+    """
+    Add extra lines to /metrics.
+
+    Args:
+        app (Flask): The application.
+        collector (callable): Returns a list of Prometheus text lines; called
+            inside the app context on every scrape.
+    """
+    app.extensions.setdefault('metrics_collectors', []).append(collector)
+
+
+def _runtime_metrics():
+    """
+    Connection pool and API key cache gauges for this worker.
+    """
+    from app import api_key_cache, db
+    from app.utils.db_pool import pool_stats
+
+    lines = []
+    for name, value in pool_stats(db.engine).items():
+        if isinstance(value, (int, float)):
+            lines += [f'# TYPE db_pool_{name} gauge', f'db_pool_{name} {value}']
+    for name, value in api_key_cache.stats().items():
+        lines += [f'# TYPE api_key_cache_{name} gauge', f'api_key_cache_{name} {value}']
+    return lines
+
+
+_listening = False
+
+
+def _listen_for_queries():
+    """
+    Time every statement on every engine (primary and any extra binds).
+    """
+    global _listening
+    if _listening:
+        return
+    _listening = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_started'].pop()
+        metrics = current_app.extensions.get('metrics') if has_app_context() else None
+        if metrics is not None:
+            metrics.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(context):
+        started = context.connection.info.get('metrics_started') if context.connection else None
+        if started:
+            started.pop()
+
+
+metrics = Metrics()
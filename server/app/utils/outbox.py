@@ -0,0 +1,213 @@
+"""
+Transactional email outbox.
+
+Routes call `queue_email` to add a message to the `email_outbox` table inside
+their own transaction and return immediately. Messages are then delivered
+by `OutboxWorker`, either as a background thread in each web worker or as a
+separate process (`flask send-outbox`). Each delivery pass claims a batch of
+due messages, sends them over a single SMTP connection and schedules failed
+messages for retry with exponential backoff.
+"""
+
+import logging
+import os
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import select
+from app import db, mail
+from app.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, recipients, body):
+    """
+    Add an email to the outbox in the current transaction.
+
+    The message is only delivered once the caller commits; call
+    `outbox_worker.notify()` after the commit to deliver it right away.
+
+    Args:
+        subject (str): The email subject.
+        recipients (list): Recipient addresses.
+        body (str): The plain-text body.
+
+    Returns:
+        EmailOutbox: The pending outbox row.
+    """
+    message = EmailOutbox(subject=subject, recipients=','.join(recipients), body=body)
+    db.session.add(message)
+    return message
+
+
+def queue_emails(messages):
+    """
+    Add many emails to the outbox with one multi-row INSERT.
+
+    Args:
+        messages (list): (subject, recipients, body) tuples.
+    """
+    if not messages:
+        return
+    now = datetime.utcnow()
+    db.session.execute(EmailOutbox.__table__.insert(), [
+        {"subject": subject, "recipients": ','.join(recipients), "body": body,
+         "status": 'pending', "attempts": 0, "created_at": now, "next_attempt_at": now}
+        for subject, recipients, body in messages
+    ])
+
+
+def deliver_pending(batch_size, max_attempts, retry_base):
+    """
+    Deliver one batch of due outbox messages over a single SMTP connection.
+
+    Args:
+        batch_size (int): Maximum number of messages to claim.
+        max_attempts (int): Attempts after which a message is marked failed.
+        retry_base (int): Seconds before the first retry; doubles per attempt.
+
+    Returns:
+        int: The number of messages claimed in this pass.
+    """
+    now = datetime.utcnow()
+    messages = db.session.execute(
+        select(EmailOutbox)
+        .where(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)  # Lets several workers drain in parallel
+    ).scalars().all()
+    if not messages:
+        db.session.rollback()
+        return 0
+
+    def record_failure(message, error):
+        message.attempts += 1
+        message.last_error = f"{type(error).__name__}: {error}"
+        if message.attempts >= max_attempts:
+            message.status = 'failed'
+            logger.error("Giving up on outbox message %s: %s", message.id, error)
+        else:
+            delay = retry_base * 2 ** (message.attempts - 1)
+            message.next_attempt_at = now + timedelta(seconds=delay)
+
+    # Flask-Mail is only initialised in processes that actually send email
+    if 'mail' not in current_app.extensions:
+        mail.init_app(current_app)
+
+    handled = set()
+    try:
+        with mail.connect() as connection:
+            for message in messages:
+                handled.add(message.id)
+                try:
+                    connection.send(Message(
+                        subject=message.subject,
+                        recipients=message.recipients.split(','),
+                        body=message.body,
+                    ))
+                except Exception as e:
+                    # Anything wrong with this one message (SMTP refusal,
+                    # bad header, missing sender) must not block the rest
+                    record_failure(message, e)
+                    continue
+                message.status = 'sent'
+                message.sent_at = datetime.utcnow()
+                message.attempts += 1
+                # Bodies may carry secrets such as API keys; keep only metadata
+                message.body = ''
+    except (smtplib.SMTPException, OSError) as e:
+        # Could not connect, or the connection dropped: retry the rest later
+        for message in messages:
+            if message.id not in handled:
+                record_failure(message, e)
+
+    db.session.commit()
+    return len(messages)
+
+
+class OutboxWorker:
+    """
+    Background thread that drains the email outbox.
+
+    Follows the Flask extension pattern; `init_app` reads MAIL_OUTBOX_*
+    settings. The thread is started lazily in each process (so it survives
+    gunicorn forking) and wakes up on `notify()` or every poll interval.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['outbox_worker'] = self
+        if app.config['MAIL_OUTBOX_WORKER']:
+            # Pick up messages left pending by a previous process
+            app.before_request(self.ensure_started)
+
+    @property
+    def enabled(self):
+        return bool(self.app and self.app.config['MAIL_OUTBOX_WORKER'])
+
+    def notify(self):
+        """
+        Wake the worker up to deliver newly committed messages.
+        """
+        if not self.enabled:
+            return
+        self.ensure_started()
+        self._wakeup.set()
+
+    def ensure_started(self):
+        """
+        Start the delivery thread in this process if it is not running.
+        """
+        if self._thread and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def drain(self):
+        """
+        Deliver due messages until none are left.
+
+        Returns:
+            int: The number of messages processed.
+        """
+        config = self.app.config
+        batch_size = config['MAIL_OUTBOX_BATCH_SIZE']
+        total = 0
+        while True:
+            claimed = deliver_pending(
+                batch_size, config['MAIL_OUTBOX_MAX_ATTEMPTS'], config['MAIL_OUTBOX_RETRY_BASE']
+            )
+            total += claimed
+            if claimed < batch_size:
+                return total
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.app.config['MAIL_OUTBOX_POLL_INTERVAL'])
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    self.drain()
+                except Exception:
+                    logger.exception("Email outbox delivery pass failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+outbox_worker = OutboxWorker()
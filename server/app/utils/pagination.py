@@ -0,0 +1,83 @@
+"""
+Helpers for keyset (cursor) pagination.
+
+Listing endpoints page through tables by the last key seen (the primary key,
+or a composite such as (timestamp, id)) instead of OFFSET, so every page is a
+bounded index range scan no matter how deep the caller has paged.
+"""
+
+from datetime import datetime
+from flask import request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def get_page_args(default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE, parse_cursor=int):
+    """
+    Read `limit` and `after` from the query string.
+
+    Args:
+        default (int): Page size used when `limit` is not given.
+        maximum (int): Upper bound on the page size a caller may request.
+        parse_cursor (callable): Converts the `after` string into the key
+            of the last row seen; raises ValueError if it is malformed.
+
+    Returns:
+        tuple: (limit, after) where `after` is the last key seen or None.
+
+    Raises:
+        ValueError: If either argument is malformed.
+    """
+    try:
+        limit = int(request.args.get('limit', default))
+        after = request.args.get('after')
+        after = parse_cursor(after) if after not in (None, '') else None
+    except ValueError:
+        raise ValueError("limit must be an integer and after a valid cursor")
+
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum), after
+
+
+def set_next_cursor(response, rows, limit, key=lambda row: row[0]):
+    """
+    Advertise the cursor for the next page on a response.
+
+    When a full page was returned, the `X-Next-Cursor` header carries the key
+    of the last row so the caller can pass it back as `after`.
+
+    Args:
+        response (Response): The response to decorate.
+        rows (list): The rows that were returned on this page.
+        limit (int): The page size that was requested.
+        key (callable): Extracts the cursor value from a row.
+
+    Returns:
+        Response: The same response, for chaining.
+    """
+    if rows and len(rows) == limit:
+        response.headers['X-Next-Cursor'] = str(key(rows[-1]))
+    return response
+
+
+def timestamp_cursor(timestamp, row_id):
+    """
+    Encode a composite (timestamp, id) keyset cursor as "<ISO timestamp>,<id>".
+    """
+    return f"{timestamp.isoformat()},{row_id}"
+
+
+def parse_timestamp_cursor(value):
+    """
+    Decode a cursor built by `timestamp_cursor`.
+
+    Returns:
+        tuple: (datetime, int)
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    timestamp, _, row_id = value.rpartition(',')
+    return datetime.fromisoformat(timestamp), int(row_id)
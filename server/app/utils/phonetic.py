@@ -0,0 +1,62 @@
+"""
+Phonetic name codes used as duplicate-detection blocking keys.
+
+Names are reduced to their American Soundex code ('Smith', 'Smyth' and
+'Smithe' are all S530), so spelling variants of the same name share a key
+that can be indexed and looked up exactly.
+"""
+
+import unicodedata
+
+_SOUNDEX_DIGITS = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def fold(name):
+    """
+    Lowercase `name` and strip accents and anything but ASCII letters.
+    """
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    return ''.join(c for c in decomposed.lower() if 'a' <= c <= 'z')
+
+
+def soundex(name):
+    """
+    Return the four-character Soundex code of `name`, or '' if it has no letters.
+    """
+    letters = fold(name)
+    if not letters:
+        return ''
+
+    code = letters[0].upper()
+    previous = _SOUNDEX_DIGITS.get(letters[0])
+    for c in letters[1:]:
+        digit = _SOUNDEX_DIGITS.get(c)
+        if digit is not None and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in 'hw':
+            # Letters coded the same are merged across h and w, not vowels
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def first_name_code(context):
+    """
+    Column default: Soundex code of the first_name being inserted.
+    """
+    return soundex(context.get_current_parameters().get('first_name'))
+
+
+def last_name_code(context):
+    """
+    Column default: Soundex code of the last_name being inserted.
+    """
+    return soundex(context.get_current_parameters().get('last_name'))
@@ -0,0 +1,180 @@
+"""
+Read-replica routing.
+
+Replica URLs from SQLALCHEMY_REPLICA_URIS are registered as extra binds
+('replica_0', 'replica_1', ...) sharing the primary's engine options.
+Views decorated with `@read_only` pick one healthy replica per request,
+round-robin, and `RoutingSession` sends that request's plain SELECTs to it.
+Everything else goes to the primary:
+    - routes that are not marked read-only,
+    - flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE and raw SQL,
+    - every statement after the request has written anything,
+    - requests from a client that wrote within the last
+      REPLICA_STICKY_SECONDS (tracked with a cookie), or that send an
+      `X-Read-Primary: 1` header, so clients read their own writes.
+
+A replica whose connection fails is taken out of rotation for
+REPLICA_RETRY_INTERVAL seconds and the view is retried once on the primary.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'read_primary_until'
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica chosen for the current request.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or (clause is not None and not _is_plain_select(clause)):
+                # Reads after a write must see it: stay on the primary from now on
+                self.info['wrote'] = True
+            elif clause is not None and not self.info.get('wrote'):
+                key = g.get('db_replica') if has_request_context() else None
+                if key is not None:
+                    return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_plain_select(clause):
+    return (
+        clause is not None and getattr(clause, 'is_select', False)
+        and getattr(clause, '_for_update_arg', None) is None
+    )
+
+
+class ReplicaRouter:
+    """
+    Flask extension choosing a replica for read-only requests.
+
+    Follows the Flask extension pattern; `init_app` must run before
+    `db.init_app` so the replica binds exist when engines are created.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._down_until = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['replicas'] = self
+        uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.keys = []
+        for i, uri in enumerate(uris):
+            key = f'replica_{i}'
+            binds[key] = {"url": uri, **options}
+            self.keys.append(key)
+        self._down_until = {}
+        self._cycle = itertools.cycle(self.keys) if self.keys else None
+        if self.keys:
+            from app.utils.metrics import register_collector
+
+            app.after_request(self._remember_writes)
+            register_collector(app, replica_metrics)
+
+    def choose(self):
+        """
+        Return the bind key of the next healthy replica, or None to use the primary.
+        """
+        if self._cycle is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.keys)):
+                key = next(self._cycle)
+                if self._down_until.get(key, 0) <= now:
+                    return key
+        return None
+
+    def mark_down(self, key):
+        retry = current_app.config['REPLICA_RETRY_INTERVAL']
+        with self._lock:
+            self._down_until[key] = time.monotonic() + retry
+        logger.warning("Read replica %s failed; using the primary for %ss", key, retry)
+
+    def status(self):
+        """
+        Return {bind key: healthy} for every configured replica.
+        """
+        now = time.monotonic()
+        return {key: self._down_until.get(key, 0) <= now for key in self.keys}
+
+    def wants_primary(self):
+        """
+        Return True if the client asked to read its own recent writes.
+        """
+        if request.headers.get('X-Read-Primary', '').lower() in ('1', 'true', 'yes'):
+            return True
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _remember_writes(self, response):
+        from app import db
+
+        if db.session.info.get('wrote') and response.status_code < 400:
+            until = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(
+                STICKY_COOKIE, f'{until:.3f}', max_age=current_app.config['REPLICA_STICKY_SECONDS'],
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def read_only(f):
+    """
+    Decorator marking a view as read-only, so its SELECTs may be served by
+    a replica. Place it above the auth decorators so the key lookup is
+    routed too.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = None if replicas.wants_primary() else replicas.choose()
+        if key is None:
+            return f(*args, **kwargs)
+
+        g.db_replica = key
+        try:
+            return f(*args, **kwargs)
+        except DBAPIError as e:
+            # OperationalError covers refused and broken connections for
+            # both psycopg and sqlite
+            if not (e.connection_invalidated or isinstance(e, OperationalError)):
+                raise
+            from app import db
+
+            replicas.mark_down(key)
+            db.session.rollback()
+            g.db_replica = None
+            return f(*args, **kwargs)
+
+    return decorated
+
+
+def replica_metrics():
+    """
+    /metrics lines reporting whether each replica is in rotation.
+    """
+    lines = ['# TYPE db_replica_healthy gauge']
+    for key, healthy in replicas.status().items():
+        lines.append(f'db_replica_healthy{{replica="{key}"}} {int(healthy)}')
+    return lines
+
+
+replicas = ReplicaRouter()
@@ -0,0 +1,233 @@
+"""
+Client name search.
+
+On PostgreSQL, searches run against the trigram (GIN) and prefix
+(text_pattern_ops) indexes on lower(first_name) / lower(last_name) created
+by the `add client name search indexes` migration and are ranked in SQL.
+
+Other databases (SQLite under TestingConfig) fall back to an in-memory
+trigram index of client names that is kept in step with the `clients`
+table incrementally: rows changed since the last refresh are read from the
+(updated_at, id) index, and deleted clients are dropped using their
+tombstones.
+
+Both backends rank results the same way: exact name match, then prefix
+match, then substring match, with trigram similarity and ID as tie-breakers.
+"""
+
+import threading
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import case, func, or_, select
+from app import db
+from app.models import Client, Tombstone
+
+# Queries shorter than this cannot use trigrams, so they only match prefixes
+MIN_TRIGRAM_LENGTH = 3
+
+EXACT, PREFIX, SUBSTRING = 3, 2, 1
+
+# Escape character for LIKE patterns; avoids backslash quoting differences
+LIKE_ESCAPE = '!'
+
+
+def _escape_like(value):
+    """
+    Escape LIKE wildcards so user input is matched literally.
+    """
+    return value.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+
+def _trigrams(value):
+    """
+    Return the set of padded trigrams for a lowercased string, as pg_trgm does.
+    """
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    """
+    Trigram similarity in [0, 1], matching pg_trgm's similarity().
+    """
+    ta, tb = _trigrams(a), _trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _match_rank(q, name):
+    """
+    Return EXACT, PREFIX, SUBSTRING or 0 for how `name` matches `q`.
+    """
+    if name == q:
+        return EXACT
+    if name.startswith(q):
+        return PREFIX
+    if len(q) >= MIN_TRIGRAM_LENGTH and q in name:
+        return SUBSTRING
+    return 0
+
+
+def _search_postgres(q, limit, offset):
+    """
+    Ranked search using the pg_trgm and text_pattern_ops indexes.
+    """
+    first = func.lower(Client.first_name)
+    last = func.lower(Client.last_name)
+    prefix = _escape_like(q) + '%'
+
+    if len(q) >= MIN_TRIGRAM_LENGTH:
+        substring = '%' + _escape_like(q) + '%'
+        condition = or_(first.like(substring, escape=LIKE_ESCAPE), last.like(substring, escape=LIKE_ESCAPE))
+    else:
+        condition = or_(first.like(prefix, escape=LIKE_ESCAPE), last.like(prefix, escape=LIKE_ESCAPE))
+
+    rank = case(
+        (or_(first == q, last == q), EXACT),
+        (or_(first.like(prefix, escape=LIKE_ESCAPE), last.like(prefix, escape=LIKE_ESCAPE)), PREFIX),
+        else_=SUBSTRING,
+    )
+    similarity = func.greatest(func.similarity(first, q), func.similarity(last, q))
+
+    query = (
+        select(Client.id, Client.first_name, Client.last_name)
+        .where(condition)
+        .order_by(rank.desc(), similarity.desc(), Client.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return db.session.execute(query).all()
+
+
+class NGramIndex:
+    """
+    In-memory trigram index over client names, used when the database has
+    no trigram support. Each worker builds its own copy lazily.
+    """
+
+    def __init__(self):
+        self._names = {}      # client id -> (first_name, last_name, lower first, lower last, updated_at)
+        self._postings = {}   # trigram -> set of client ids
+        self._changed_since = None  # Latest updated_at indexed
+        self._deleted_since = None  # Latest client tombstone applied
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        Forget everything indexed so far; the next search rebuilds the index.
+        """
+        with self._lock:
+            self._names.clear()
+            self._postings.clear()
+            self._changed_since = self._deleted_since = None
+
+    def _remove(self, client_id):
+        entry = self._names.pop(client_id, None)
+        if entry is None:
+            return
+        for gram in _trigrams(entry[2]) | _trigrams(entry[3]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(client_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _add(self, client_id, first_name, last_name, updated_at):
+        lower_first, lower_last = first_name.lower(), last_name.lower()
+        self._names[client_id] = (first_name, last_name, lower_first, lower_last, updated_at)
+        for gram in _trigrams(lower_first) | _trigrams(lower_last):
+            self._postings.setdefault(gram, set()).add(client_id)
+
+    def refresh(self):
+        """
+        Apply the clients registered, renamed or deleted since the last refresh.
+
+        Changes are read from the (updated_at, id) index and deletions from
+        the client tombstones, each from SYNC_SAFETY_SECONDS before the
+        latest one seen, since a transaction can commit after rows with
+        later timestamps are visible; re-applying a change is harmless.
+        """
+        overlap = timedelta(seconds=current_app.config['SYNC_SAFETY_SECONDS'])
+        with self._lock:
+            if self._changed_since is None:
+                # Clients deleted so far are simply not loaded below
+                self._deleted_since = db.session.execute(
+                    select(func.max(Tombstone.deleted_at)).where(Tombstone.entity == 'clients')
+                ).scalar()
+            else:
+                query = select(Tombstone.entity_id, Tombstone.deleted_at).where(Tombstone.entity == 'clients')
+                if self._deleted_since is not None:
+                    query = query.where(Tombstone.deleted_at >= self._deleted_since - overlap)
+                for client_id, deleted_at in db.session.execute(query):
+                    entry = self._names.get(client_id)
+                    # A later row may reuse the id of a deleted one (SQLite)
+                    if entry is not None and entry[4] <= deleted_at:
+                        self._remove(client_id)
+                    if self._deleted_since is None or deleted_at > self._deleted_since:
+                        self._deleted_since = deleted_at
+
+            query = select(Client.id, Client.first_name, Client.last_name, Client.updated_at)
+            if self._changed_since is not None:
+                query = query.where(Client.updated_at >= self._changed_since - overlap)
+            for client_id, first_name, last_name, updated_at in db.session.execute(query):
+                entry = self._names.get(client_id)
+                if entry is not None and entry[4] == updated_at:
+                    continue  # Already indexed by an earlier refresh
+                self._remove(client_id)
+                self._add(client_id, first_name, last_name, updated_at)
+                if self._changed_since is None or updated_at > self._changed_since:
+                    self._changed_since = updated_at
+
+    def _candidates(self, q):
+        """
+        Return the IDs of clients whose names contain every trigram of `q`.
+        """
+        if len(q) < MIN_TRIGRAM_LENGTH:
+            return self._names.keys()
+        # Drop the leading/trailing padding grams: `q` may occur mid-name
+        padded = f"  {q} "
+        grams = {padded[i:i + 3] for i in range(2, len(padded) - 3)}
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        if not postings:
+            return set()
+        return set.intersection(*postings)
+
+    def search(self, q, limit, offset):
+        """
+        Return ranked (id, first_name, last_name) tuples matching `q`.
+        """
+        self.refresh()
+        scored = []
+        with self._lock:
+            for client_id in self._candidates(q):
+                first_name, last_name, lower_first, lower_last, _ = self._names[client_id]
+                rank = max(_match_rank(q, lower_first), _match_rank(q, lower_last))
+                if not rank:
+                    continue
+                similarity = max(_similarity(lower_first, q), _similarity(lower_last, q))
+                scored.append((-rank, -similarity, client_id, first_name, last_name))
+
+        scored.sort()
+        return [row[2:] for row in scored[offset:offset + limit]]
+
+
+ngram_index = NGramIndex()
+
+
+def search_clients(q, limit, offset=0):
+    """
+    Search clients by first or last name.
+
+    Args:
+        q (str): The search term; matching is case-insensitive.
+        limit (int): Maximum number of results to return.
+        offset (int): Number of ranked results to skip.
+
+    Returns:
+        list: (id, first_name, last_name) tuples, best matches first.
+    """
+    q = q.lower()
+    if db.engine.dialect.name == 'postgresql':
+        return _search_postgres(q, limit, offset)
+    return ngram_index.search(q, limit, offset)
@@ -0,0 +1,188 @@
+"""
+Row serializers shared by the routes.
+
+A serializer pairs the columns a response needs with the JSON keys they are
+returned under. Routes select exactly those columns (`serializer.select()`)
+and turn the resulting `Row` tuples straight into dicts, without loading ORM
+instances. Dotted keys such as 'client.id' produce nested objects. Values
+are left as-is (dates included); the app's JSON provider encodes them.
+
+Serializers are registered per model and view name, e.g.
+`serializer_for(Client, 'summary')`.
+"""
+
+from sqlalchemy import select
+from app.models import Client, Enrollment, HealthProgram
+
+_registry = {}
+
+
+class RowSerializer:
+    """
+    Converts rows selected from a fixed list of columns into dicts.
+    """
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields (dict): JSON key -> column expression, in response order.
+        """
+        self.keys = tuple(fields)
+        self.columns = tuple(fields.values())
+        self.nested = any('.' in key for key in self.keys)
+        self._paths = [tuple(key.split('.')) for key in self.keys]
+
+    def select(self):
+        """
+        Return a SELECT of the serializer's columns, to be refined by the caller.
+        """
+        return select(*self.columns)
+
+    def dump(self, row):
+        """
+        Convert one row (a tuple in column order) into a dict.
+        """
+        if not self.nested:
+            return dict(zip(self.keys, row))
+        result = {}
+        for path, value in zip(self._paths, row):
+            target = result
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = value
+        return result
+
+    def dump_all(self, rows):
+        """
+        Convert an iterable of rows into a list of dicts.
+        """
+        if not self.nested:
+            keys = self.keys
+            return [dict(zip(keys, row)) for row in rows]
+        return [self.dump(row) for row in rows]
+
+
+def register(model, view, fields):
+    """
+    Register a serializer for `model` under the name `view`.
+
+    Returns:
+        RowSerializer: The new serializer.
+    """
+    serializer = RowSerializer(fields)
+    _registry[(model, view)] = serializer
+    return serializer
+
+
+def serializer_for(model, view):
+    """
+    Return the serializer registered for `model` and `view`.
+
+    Raises:
+        KeyError: If no such serializer is registered.
+    """
+    return _registry[(model, view)]
+
+
+register(Client, 'summary', {
+    "id": Client.id,
+    "first_name": Client.first_name,
+    "last_name": Client.last_name,
+})
+
+register(Client, 'profile', {
+    "id": Client.id,
+    "first_name": Client.first_name,
+    "last_name": Client.last_name,
+    "date_of_birth": Client.date_of_birth,
+    "gender": Client.gender,
+    "contact_info": Client.contact_info,
+    "registered_at": Client.registered_at,
+})
+
+register(HealthProgram, 'catalogue', {
+    "id": HealthProgram.id,
+    "name": HealthProgram.name,
+    "description": HealthProgram.description,
+    "created_at": HealthProgram.created_at,
+})
+
+# A client's enrollment as shown on their profile
+register(Enrollment, 'client_program', {
+    "id": HealthProgram.id,
+    "name": HealthProgram.name,
+    "enrolled_at": Enrollment.enrolled_at,
+    "status": Enrollment.status,
+})
+
+# A program's enrollment as listed by /api/programs/<id>/enrollments
+register(Enrollment, 'program_listing', {
+    "id": Enrollment.id,
+    "client.id": Client.id,
+    "client.first_name": Client.first_name,
+    "client.last_name": Client.last_name,
+    "status": Enrollment.status,
+    "enrolled_at": Enrollment.enrolled_at,
+})
+
+# Full records as returned by /api/sync, which keys its cursors on updated_at
+register(Client, 'sync', {
+    "id": Client.id,
+    "first_name": Client.first_name,
+    "last_name": Client.last_name,
+    "date_of_birth": Client.date_of_birth,
+    "gender": Client.gender,
+    "contact_info": Client.contact_info,
+    "registered_at": Client.registered_at,
+    "updated_at": Client.updated_at,
+})
+
+register(HealthProgram, 'sync', {
+    "id": HealthProgram.id,
+    "name": HealthProgram.name,
+    "description": HealthProgram.description,
+    "created_at": HealthProgram.created_at,
+    "updated_at": HealthProgram.updated_at,
+})
+
+register(Enrollment, 'sync', {
+    "id": Enrollment.id,
+    "client_id": Enrollment.client_id,
+    "program_id": Enrollment.program_id,
+    "status": Enrollment.status,
+    "enrolled_at": Enrollment.enrolled_at,
+    "updated_at": Enrollment.updated_at,
+})
+
+# Registry extracts (app.utils.export); enrollments are flattened so every
+# export format can hold them
+register(Client, 'export', {
+    "id": Client.id,
+    "first_name": Client.first_name,
+    "last_name": Client.last_name,
+    "date_of_birth": Client.date_of_birth,
+    "gender": Client.gender,
+    "contact_info": Client.contact_info,
+    "registered_at": Client.registered_at,
+    "updated_at": Client.updated_at,
+})
+
+register(HealthProgram, 'export', {
+    "id": HealthProgram.id,
+    "name": HealthProgram.name,
+    "description": HealthProgram.description,
+    "created_at": HealthProgram.created_at,
+    "updated_at": HealthProgram.updated_at,
+})
+
+register(Enrollment, 'export', {
+    "id": Enrollment.id,
+    "client_id": Enrollment.client_id,
+    "client_first_name": Client.first_name,
+    "client_last_name": Client.last_name,
+    "program_id": Enrollment.program_id,
+    "program_name": HealthProgram.name,
+    "status": Enrollment.status,
+    "enrolled_at": Enrollment.enrolled_at,
+    "updated_at": Enrollment.updated_at,
+})
@@ -0,0 +1,178 @@
+"""
+Short-lived signed access tokens.
+
+A doctor exchanges their API key once at `/api/auth/validate` for an HS256
+JWT signed with SECRET_KEY. The token carries the doctor's id, name, email
+and admin flag, so `api_key_required` can authenticate it without touching
+the database.
+
+Revocation is checked against an in-memory set of revoked token ids (a
+token's `jti`, or the `kid` of the API key it was issued for). Each worker
+reloads that set from the `revoked_tokens` table at most every
+ACCESS_TOKEN_REVOCATION_REFRESH seconds; rows only live until the tokens
+they cover would have expired, so the set stays small.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+import jwt
+from flask import current_app
+from sqlalchemy import delete, select
+from app import db
+from app.models import RevokedToken
+from app.utils.bulk import insert_ignore, supports_insert_ignore
+
+ALGORITHM = 'HS256'
+
+
+def key_id(api_key):
+    """
+    Return the non-secret id of an API key that tokens refer to it by.
+    """
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+def tokens_enabled():
+    return bool(current_app.config['ACCESS_TOKENS_ENABLED'])
+
+
+def issue_access_token(doctor, api_key):
+    """
+    Sign an access token for an authenticated doctor.
+
+    Args:
+        doctor (DoctorSnapshot): The doctor the API key belongs to.
+        api_key (str): The API key being exchanged.
+
+    Returns:
+        tuple: (token, lifetime in seconds).
+    """
+    ttl = current_app.config['ACCESS_TOKEN_TTL']
+    now = datetime.utcnow()
+    claims = {
+        "sub": str(doctor.id),
+        "name": doctor.name,
+        "email": doctor.email,
+        "adm": bool(doctor.is_admin),
+        "kid": key_id(api_key),
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(seconds=ttl),
+    }
+    return jwt.encode(claims, current_app.config['SECRET_KEY'], algorithm=ALGORITHM), ttl
+
+
+def decode_access_token(token):
+    """
+    Verify an access token's signature, expiry and revocation.
+
+    Returns:
+        dict: The token claims, or None if the token is not acceptable.
+    """
+    try:
+        claims = jwt.decode(
+            token, current_app.config['SECRET_KEY'], algorithms=[ALGORITHM],
+            options={"require": ["sub", "exp", "jti", "kid"]},
+        )
+    except jwt.InvalidTokenError:
+        return None
+    if revocation_list.contains(claims['jti'], claims['kid']):
+        return None
+    return claims
+
+
+def revoke_tokens(expires_at, *token_ids):
+    """
+    Revoke token ids (jti or API key ids) in the current transaction.
+
+    The revocation takes effect in this worker immediately and in the others
+    on their next refresh, once the caller commits. Expired revocations are
+    pruned at the same time.
+
+    Args:
+        expires_at (datetime): When every token covered by the ids expires.
+        *token_ids (str): The ids to revoke.
+    """
+    if not token_ids:
+        return
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    rows = [{"token_id": token_id, "expires_at": expires_at} for token_id in token_ids]
+    if supports_insert_ignore():
+        db.session.execute(insert_ignore(RevokedToken, ['token_id']), rows)
+    else:
+        for row in rows:
+            db.session.merge(RevokedToken(**row))
+    revocation_list.add(expires_at, *token_ids)
+
+
+def revoke_api_key_tokens(*api_keys):
+    """
+    Revoke every access token issued for the given API keys.
+    """
+    expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['ACCESS_TOKEN_TTL'])
+    revoke_tokens(expires_at, *(key_id(key) for key in api_keys))
+
+
+class RevocationList:
+    """
+    Per-worker copy of the unexpired ids in `revoked_tokens`.
+
+    Follows the Flask extension pattern; `init_app` reads the refresh
+    interval from ACCESS_TOKEN_REVOCATION_REFRESH.
+    """
+
+    def __init__(self, refresh_interval=10):
+        self.refresh_interval = refresh_interval
+        self._ids = frozenset()
+        self._local = {}  # id -> expiry of ids revoked by this worker
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get('ACCESS_TOKEN_REVOCATION_REFRESH', self.refresh_interval)
+        self._ids = frozenset()
+        self._local = {}
+        self._loaded_at = None
+
+    def contains(self, *token_ids):
+        """
+        Return True if any of the ids is revoked.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval:
+            self.refresh()
+        ids = self._ids
+        return any(token_id in ids for token_id in token_ids)
+
+    def add(self, expires_at, *token_ids):
+        """
+        Revoke ids in this worker right away, without waiting for a refresh
+        (which may run before the revoking transaction commits).
+        """
+        with self._lock:
+            self._local.update(dict.fromkeys(token_ids, expires_at))
+            self._ids = self._ids.union(token_ids)
+
+    def refresh(self):
+        """
+        Reload the revoked ids from the database.
+        """
+        with self._lock:
+            loaded_at = self._loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_interval:
+                return  # Another thread refreshed while we waited
+            now = datetime.utcnow()
+            ids = db.session.execute(
+                select(RevokedToken.token_id).where(RevokedToken.expires_at > now)
+            ).scalars().all()
+            self._local = {
+                token_id: expires_at for token_id, expires_at in self._local.items() if expires_at > now
+            }
+            self._ids = frozenset(ids).union(self._local)
+            self._loaded_at = time.monotonic()
+
+
+revocation_list = RevocationList()
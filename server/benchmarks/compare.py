@@ -0,0 +1,66 @@
+"""
+Compare two endpoint benchmark result files.
+
+Prints the change in p50/p95 latency, throughput and queries per request for
+every endpoint present in both runs, and exits non-zero if any p95 latency
+regressed by more than --threshold percent (so it can gate CI).
+
+Usage (from the server/ directory):
+    python -m benchmarks.compare benchmarks/results/abc123-testclient.json \
+        benchmarks/results/def456-testclient.json
+"""
+
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    """
+    Percentage change from `old` to `new`, or None if undefined.
+    """
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def fmt(pct):
+    return '      n/a' if pct is None else f'{pct:>+8.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='p95 regression (percent) that fails the comparison')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta']['commit']} ({baseline['meta']['mode']})")
+    print(f"candidate {candidate['meta']['commit']} ({candidate['meta']['mode']})")
+    print(f"{'endpoint':<22}{'p50':>10}{'p95':>10}{'req/s':>10}{'q/req':>14}")
+
+    regressions = []
+    for name, old in baseline['results'].items():
+        new = candidate['results'].get(name)
+        if new is None:
+            continue
+        p95 = change(old['p95_ms'], new['p95_ms'])
+        queries = f"{old['queries_per_request']} -> {new['queries_per_request']}"
+        print(f"{name:<22}{fmt(change(old['p50_ms'], new['p50_ms']))}{fmt(p95)}"
+              f"{fmt(change(old['throughput_rps'], new['throughput_rps']))}{queries:>14}")
+        if p95 is not None and p95 > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
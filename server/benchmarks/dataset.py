@@ -0,0 +1,99 @@
+"""
+Synthetic dataset for benchmarks.
+
+Seeds doctors (each with an active API key), health programs, clients and
+enrollments into a scratch database with bulk Core inserts. The data is
+deterministic for a given size so results are comparable between commits.
+Doctor 1 is a super admin.
+"""
+
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+
+from app import db
+from app.models import APIKey, Client, Doctor, Enrollment, HealthProgram, ProgramEnrollmentCount
+
+EPOCH = datetime(2024, 1, 1)
+
+FIRST_NAMES = (
+    'Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Faith', 'George', 'Hassan',
+    'Irene', 'James', 'Joy', 'Kevin', 'Lucy', 'Mary', 'Njeri', 'Otieno',
+    'Peter', 'Grace', 'Samuel', 'Wanjiru', 'Yusuf', 'Zawadi',
+)
+LAST_NAMES = (
+    'Achieng', 'Barasa', 'Cheruiyot', 'Kamau', 'Kariuki', 'Kiprono', 'Macharia',
+    'Mohamed', 'Mutua', 'Mwangi', 'Njoroge', 'Ochieng', 'Odhiambo', 'Omondi',
+    'Otieno', 'Wafula', 'Wambui', 'Wanjala',
+)
+
+BATCH_SIZE = 50000
+
+
+def api_key_for(doctor_id):
+    """
+    Return the deterministic API key seeded for a doctor.
+    """
+    return f"{doctor_id:064x}"
+
+
+def seed(engine, clients, doctors=50, programs=20, enrollments_per_client=2, seed_value=42):
+    """
+    Drop and recreate the schema on `engine`, then fill it with synthetic rows.
+
+    Args:
+        engine (Engine): The scratch database; existing tables are dropped.
+        clients (int): Number of clients.
+        doctors (int): Number of doctors (and API keys).
+        programs (int): Number of health programs.
+        enrollments_per_client (int): Distinct programs each client is enrolled in.
+        seed_value (int): Random seed.
+    """
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    rng = random.Random(seed_value)
+    year = 365 * 24 * 3600
+    enrollments_per_client = min(enrollments_per_client, programs)
+
+    with engine.begin() as conn:
+        conn.execute(Doctor.__table__.insert(), [
+            {"id": d, "name": f"Doctor {d}", "email": f"doctor{d}@example.com", "is_admin": d == 1}
+            for d in range(1, doctors + 1)
+        ])
+        conn.execute(APIKey.__table__.insert(), [
+            {"key": api_key_for(d), "doctor_id": d, "created_at": EPOCH, "is_active": True}
+            for d in range(1, doctors + 1)
+        ])
+        conn.execute(HealthProgram.__table__.insert(), [
+            {"id": p, "name": f"Program {p}", "description": f"Synthetic program {p}",
+             "created_at": EPOCH, "created_by_id": 1}
+            for p in range(1, programs + 1)
+        ])
+
+        for start in range(1, clients + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE, clients + 1))
+            conn.execute(Client.__table__.insert(), [
+                {"id": c,
+                 "first_name": rng.choice(FIRST_NAMES),
+                 "last_name": rng.choice(LAST_NAMES),
+                 "date_of_birth": (EPOCH - timedelta(days=rng.randrange(90 * 365))).date(),
+                 "gender": rng.choice(('M', 'F')),
+                 "contact_info": f"07{rng.randrange(10 ** 8):08d}",
+                 "registered_at": EPOCH + timedelta(seconds=rng.randrange(year)),
+                 "created_by_id": rng.randint(1, doctors)}
+                for c in ids
+            ])
+            rows = []
+            for c in ids:
+                for p in rng.sample(range(1, programs + 1), enrollments_per_client):
+                    rows.append({"client_id": c, "program_id": p, "status": "active",
+                                 "enrolled_at": EPOCH + timedelta(seconds=rng.randrange(year))})
+            if rows:
+                conn.execute(Enrollment.__table__.insert(), rows)
+
+        # Derived per-program counters, as `flask rebuild-program-stats` builds them
+        conn.execute(ProgramEnrollmentCount.__table__.insert().from_select(
+            ['program_id', 'status', 'count'],
+            select(Enrollment.program_id, Enrollment.status, func.count())
+            .group_by(Enrollment.program_id, Enrollment.status)
+        ))
@@ -0,0 +1,354 @@
+"""
+Load and latency benchmark for every API blueprint.
+
+Seeds a synthetic dataset (see benchmarks/dataset.py) into a scratch
+database, then drives each endpoint of auth_bp, clients_bp, programs_bp,
+enroll_bp and admin_bp and reports p50/p95/p99 latency, throughput and SQL
+statements per request (read from the Server-Timing header). Email is never
+sent: provisioning emails stay queued in the outbox.
+
+Two modes:
+    testclient  In-process Flask test client, one request at a time.
+    http        Real HTTP against gunicorn (--workers processes) or, when
+                gunicorn is unavailable, Werkzeug's threaded server, driven by
+                --concurrency client threads.
+
+Results are written as JSON (default benchmarks/results/<commit>-<mode>.json)
+so runs can be diffed with `python -m benchmarks.compare old.json new.json`.
+
+Usage (from the server/ directory):
+    python -m benchmarks.endpoint_benchmark --clients 100000
+    python -m benchmarks.endpoint_benchmark --mode http --workers 4 --concurrency 16
+    python -m benchmarks.endpoint_benchmark --database-url postgresql://.../bench_db
+
+The database is dropped and recreated, so never point it at real data.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(SERVER_DIR, 'benchmarks', 'results')
+
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+class Scenario:
+    """
+    One endpoint under test: builds a request from a random generator.
+    """
+
+    def __init__(self, name, method, path, body=None, admin=False):
+        self.name = name
+        self.method = method
+        self.path = path      # callable(rng) -> str
+        self.body = body      # callable(rng) -> JSON-serializable, or None
+        self.admin = admin
+
+    def build(self, rng):
+        return self.method, self.path(rng), self.body(rng) if self.body else None
+
+
+def scenarios(clients, doctors, programs):
+    """
+    Build the list of scenarios for a dataset of the given size.
+    """
+    from benchmarks.dataset import FIRST_NAMES, LAST_NAMES
+
+    unique = itertools.count(1)
+    run_id = f"{os.getpid()}-{int(time.time())}"
+
+    def new_client(rng):
+        return {
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "date_of_birth": f"{rng.randint(1940, 2020)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            "gender": rng.choice(('M', 'F')),
+            "contact_info": f"07{rng.randrange(10 ** 8):08d}",
+        }
+
+    return [
+        Scenario('auth.validate', 'GET', lambda r: '/api/auth/validate'),
+        Scenario('clients.register', 'POST', lambda r: '/api/clients/register', new_client),
+        Scenario('clients.bulk', 'POST', lambda r: '/api/clients/bulk',
+                 lambda r: [new_client(r) for _ in range(100)]),
+        Scenario('clients.list', 'GET',
+                 lambda r: f'/api/clients/?limit=100&after={r.randrange(clients)}'),
+        Scenario('clients.search', 'GET',
+                 lambda r: f'/api/clients/search?q={r.choice(FIRST_NAMES + LAST_NAMES)[:r.randint(2, 5)]}'),
+        Scenario('clients.profile', 'GET', lambda r: f'/api/clients/{r.randint(1, clients)}'),
+        Scenario('programs.create', 'POST', lambda r: '/api/programs/create',
+                 lambda r: {"name": f"Bench program {run_id}-{next(unique)}", "description": "benchmark"}),
+        Scenario('programs.list', 'GET', lambda r: '/api/programs/list'),
+        Scenario('enrollments.enroll', 'POST', lambda r: f'/api/enrollments/{r.randint(1, clients)}',
+                 lambda r: {"program_ids": r.sample(range(1, programs + 1), min(3, programs))}),
+        Scenario('enrollments.cohort', 'POST', lambda r: f'/api/enrollments/program/{r.randint(1, programs)}',
+                 lambda r: {"client_ids": r.sample(range(1, clients + 1), min(200, clients))}),
+        Scenario('admin.create_doctor', 'POST', lambda r: '/api/admin/doctors',
+                 lambda r: {"name": "Bench Doctor", "email": f"bench-{run_id}-{next(unique)}@example.com"},
+                 admin=True),
+        Scenario('admin.bulk_doctors', 'POST', lambda r: '/api/admin/doctors/bulk',
+                 lambda r: {"doctors": [
+                     {"name": "Bench Doctor", "email": f"bench-{run_id}-{next(unique)}@example.com"}
+                     for _ in range(10)
+                 ]}, admin=True),
+        Scenario('admin.db_pool', 'GET', lambda r: '/api/admin/db-pool', admin=True),
+    ]
+
+
+class TestClientTransport:
+    """
+    Sends requests through the Flask test client.
+    """
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, headers, body):
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        response.get_data()
+        return response.status_code, response.headers.get('Server-Timing', ''), time.perf_counter() - started
+
+
+class HTTPTransport:
+    """
+    Sends requests over keep-alive HTTP connections, one per client thread.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def send(self, method, path, headers, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = dict(headers, **({'Content-Type': 'application/json'} if payload else {}))
+
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, '', time.perf_counter() - started
+        return response.status, response.getheader('Server-Timing') or '', time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(scenario, transport, requests, concurrency, warmup, rng_seed):
+    """
+    Drive one scenario and summarise its latencies.
+    """
+    from benchmarks.dataset import api_key_for
+
+    headers = {'API-KEY': api_key_for(1 if scenario.admin else 2)}
+    rng = random.Random(rng_seed)
+    rng_lock = threading.Lock()
+
+    def one(_):
+        with rng_lock:
+            method, path, body = scenario.build(rng)
+        return transport.send(method, path, headers, body)
+
+    for i in range(warmup):
+        one(i)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(requests)))
+    else:
+        results = [one(i) for i in range(requests)]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for _, _, elapsed in results)
+    queries = [int(m.group(1)) for _, timing, _ in results for m in [QUERY_COUNT.search(timing)] if m]
+    errors = sum(1 for status, _, _ in results if not 200 <= status < 400)
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "throughput_rps": round(requests / wall, 1) if wall else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on {host}:{port} did not start")
+
+
+def start_server(app, workers, env):
+    """
+    Start gunicorn (or Werkzeug as a fallback) and return (port, stop callable, name).
+    """
+    host, port = '127.0.0.1', free_port()
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        from werkzeug.serving import make_server
+
+        server = make_server(host, port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        wait_for_server(host, port)
+        return port, server.shutdown, 'werkzeug-threaded'
+
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', '4',
+         '--bind', f'{host}:{port}', '--log-level', 'warning', 'run:app'],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    wait_for_server(host, port)
+
+    def stop():
+        process.terminate()
+        process.wait(timeout=30)
+
+    return port, stop, f'gunicorn x{workers}'
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', default=f"sqlite:///{os.path.join(SERVER_DIR, 'benchmark.db')}")
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--programs', type=int, default=20)
+    parser.add_argument('--enrollments-per-client', type=int, default=2)
+    parser.add_argument('--mode', choices=['testclient', 'http'], default='testclient')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes (http mode)')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads (http mode)')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests per endpoint')
+    parser.add_argument('--only', action='append', help='run only the named scenario(s)')
+    parser.add_argument('--no-seed', action='store_true', help='reuse the existing dataset')
+    parser.add_argument('--output', help='results JSON path')
+    args = parser.parse_args()
+
+    # The app reads its configuration from the environment at import time
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_URL=args.database_url,
+        MAIL_OUTBOX_WORKER='false',  # Emails stay queued; nothing is sent
+        METRICS_ENABLED='true',      # Needed for the Server-Timing query counts
+        SLOW_REQUEST_MS='1000000',
+        SLOW_QUERY_MS='1000000',
+    )
+    os.environ.update(env)
+    sys.path.insert(0, SERVER_DIR)
+
+    from sqlalchemy import create_engine
+    from app import create_app
+    from benchmarks.dataset import seed
+
+    app = create_app()
+    engine = create_engine(args.database_url)
+    if not args.no_seed:
+        print(f"Seeding {args.clients} clients into {engine.url.render_as_string()}...")
+        seed(engine, args.clients, args.doctors, args.programs, args.enrollments_per_client)
+    engine.dispose()
+
+    if args.mode == 'http':
+        port, stop, server = start_server(app, args.workers, env)
+        transport = HTTPTransport('127.0.0.1', port)
+        concurrency = args.concurrency
+    else:
+        stop, server = (lambda: None), 'flask-test-client'
+        transport = TestClientTransport(app)
+        concurrency = 1
+
+    results = {}
+    try:
+        for i, scenario in enumerate(scenarios(args.clients, args.doctors, args.programs)):
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = run_scenario(
+                scenario, transport, args.requests, concurrency, args.warmup, rng_seed=i
+            )
+            r = results[scenario.name]
+            print(f"{scenario.name:<22} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                  f"p99 {r['p99_ms']:>8.2f} ms  {r['throughput_rps']:>8.1f} req/s  "
+                  f"q/req {r['queries_per_request']}  errors {r['errors']}")
+    finally:
+        stop()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": engine.url.render_as_string(hide_password=True),
+            "mode": args.mode,
+            "server": server,
+            "concurrency": concurrency,
+            "dataset": {
+                "clients": args.clients, "doctors": args.doctors, "programs": args.programs,
+                "enrollments_per_client": args.enrollments_per_client,
+            },
+            "requests_per_endpoint": args.requests,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{args.mode}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
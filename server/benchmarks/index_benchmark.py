@@ -0,0 +1,117 @@
+"""
+Before/after latency of the foreign key and timestamp indexes.
+
+Seeds a synthetic dataset into a scratch database, times the queries the
+indexes are meant to serve with the indexes dropped, then again with them
+in place, and prints a comparison table.
+
+Usage (from the server/ directory):
+    python -m benchmarks.index_benchmark --clients 1000000
+    python -m benchmarks.index_benchmark --database-url postgresql://.../bench_db
+
+The database is dropped and recreated, so never point it at real data.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from sqlalchemy import create_engine, text
+
+from app import create_app, db
+from benchmarks.dataset import EPOCH, api_key_for, seed
+
+# Indexes added by the 'add foreign key and timestamp indexes' migration (the
+# program_id index has since been folded into the enrollment listing indexes)
+BENCHMARKED_INDEXES = (
+    'ix_api_keys_doctor_id',
+    'ix_api_keys_key_is_active',
+    'ix_clients_created_by_id',
+    'ix_clients_registered_at',
+    'ix_health_programs_created_by_id',
+    'ix_enrollments_program_enrolled_at',
+    'ix_enrollments_program_status_enrolled_at',
+    'ix_enrollments_enrolled_at',
+)
+
+QUERIES = {
+    'api key auth lookup':
+        "SELECT doctor_id FROM api_keys WHERE key = :key AND is_active",
+    'keys of a doctor':
+        "SELECT id FROM api_keys WHERE doctor_id = :doctor_id",
+    'clients of a doctor':
+        "SELECT count(*) FROM clients WHERE created_by_id = :doctor_id",
+    'clients registered in a day':
+        "SELECT count(*) FROM clients WHERE registered_at >= :start AND registered_at < :end",
+    'enrollments of a program':
+        "SELECT count(*) FROM enrollments WHERE program_id = :program_id",
+    'enrollments in a day':
+        "SELECT count(*) FROM enrollments WHERE enrolled_at >= :start AND enrolled_at < :end",
+}
+
+def time_queries(engine, doctors, programs, repeat):
+    """
+    Return the median latency in milliseconds of each benchmarked query.
+    """
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                day = EPOCH + timedelta(days=rng.randrange(365))
+                params = {
+                    "key": api_key_for(rng.randint(1, doctors)),
+                    "doctor_id": rng.randint(1, doctors),
+                    "program_id": rng.randint(1, programs),
+                    "start": day,
+                    "end": day + timedelta(days=1),
+                }
+                started = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', default='sqlite:///index_benchmark.db')
+    parser.add_argument('--clients', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--programs', type=int, default=20)
+    parser.add_argument('--enrollments-per-client', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # The app is only needed for the model metadata
+    create_app()
+    engine = create_engine(args.database_url)
+
+    print(f"Seeding {args.clients} clients into {engine.url.render_as_string()}...")
+    seed(engine, args.clients, args.doctors, args.programs, args.enrollments_per_client)
+
+    indexes = [
+        index for table in db.metadata.sorted_tables for index in table.indexes
+        if index.name in BENCHMARKED_INDEXES
+    ]
+    for index in indexes:
+        index.drop(engine)
+    before = time_queries(engine, args.doctors, args.programs, args.repeat)
+
+    for index in indexes:
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    after = time_queries(engine, args.doctors, args.programs, args.repeat)
+
+    print(f"{'query':<30}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<30}{before[name]:>12.3f}{after[name]:>12.3f}{speedup:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Serialization cost of large listings: ORM + stdlib jsonify vs rows + orjson.
+
+Seeds a synthetic dataset, then times building the JSON body of 10k-row
+listings three ways, inside a request context:
+    legacy   - ORM instances, hand-built dicts with isoformat(), and Flask's
+               stdlib provider (sorted keys), as the routes used to do
+    stdlib   - registered row serializers over Row tuples, FastJSONProvider
+               with orjson disabled
+    orjson   - registered row serializers, FastJSONProvider with orjson
+
+Usage (from the server/ directory):
+    python -m benchmarks.json_benchmark --rows 10000
+
+The database is dropped and recreated, so never point it at real data.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import contains_eager
+
+from app import create_app, db
+from app.models import Client, Enrollment
+from app.utils.json_provider import FastJSONProvider, orjson
+from app.utils.serializers import serializer_for
+from benchmarks.dataset import seed
+
+
+def legacy_clients(limit):
+    clients = db.session.execute(select(Client).order_by(Client.id).limit(limit)).scalars().all()
+    return [{
+        "id": c.id,
+        "first_name": c.first_name,
+        "last_name": c.last_name,
+        "date_of_birth": c.date_of_birth.isoformat(),
+        "gender": c.gender,
+        "contact_info": c.contact_info,
+        "registered_at": c.registered_at.isoformat(),
+    } for c in clients]
+
+
+def row_clients(limit):
+    profile = serializer_for(Client, 'profile')
+    rows = db.session.execute(profile.select().order_by(Client.id).limit(limit)).all()
+    return profile.dump_all(rows)
+
+
+def legacy_enrollments(limit):
+    enrollments = db.session.execute(
+        # Eager-load clients in the same query, so this is not an N+1 comparison
+        select(Enrollment).join(Enrollment.client).options(contains_eager(Enrollment.client))
+        .order_by(Enrollment.enrolled_at, Enrollment.id).limit(limit)
+    ).scalars().all()
+    return [{
+        "id": e.id,
+        "client": {"id": e.client.id, "first_name": e.client.first_name, "last_name": e.client.last_name},
+        "status": e.status,
+        "enrolled_at": e.enrolled_at.isoformat(),
+    } for e in enrollments]
+
+
+def row_enrollments(limit):
+    listing = serializer_for(Enrollment, 'program_listing')
+    rows = db.session.execute(
+        listing.select().select_from(Enrollment).join(Client, Client.id == Enrollment.client_id)
+        .order_by(Enrollment.enrolled_at, Enrollment.id).limit(limit)
+    ).all()
+    return listing.dump_all(rows)
+
+
+LISTINGS = {
+    'clients (7 columns)': (legacy_clients, row_clients),
+    'enrollments (nested)': (legacy_enrollments, row_enrollments),
+}
+
+
+def time_body(app, provider, build, limit, repeat):
+    """
+    Median milliseconds to query, serialize and render one response body.
+    """
+    app.json = provider
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        with app.test_request_context():
+            started = time.perf_counter()
+            response = app.json.response(build(limit))
+            size = len(response.get_data())
+            samples.append((time.perf_counter() - started) * 1000)
+            db.session.remove()
+    return statistics.median(samples), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', default='sqlite:///json_benchmark.db')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    # The config classes read the environment when create_app imports them
+    os.environ.update(FLASK_ENV='production', DATABASE_URL=args.database_url,
+                      MAIL_OUTBOX_WORKER='false', METRICS_ENABLED='false')
+    app = create_app()
+    engine = create_engine(args.database_url)
+    print(f"Seeding {args.rows} clients into {engine.url.render_as_string()}...")
+    seed(engine, args.rows, programs=5, enrollments_per_client=1)
+
+    with app.app_context():
+        legacy = DefaultJSONProvider(app)
+        stdlib = FastJSONProvider(app)
+        stdlib.use_orjson = False
+        fast = FastJSONProvider(app)
+
+        print(f"{'listing':<24}{'path':<8}{'ms':>10}{'bytes':>10}{'speedup':>9}")
+        for name, (legacy_build, row_build) in LISTINGS.items():
+            baseline, size = time_body(app, legacy, legacy_build, args.rows, args.repeat)
+            print(f"{name:<24}{'legacy':<8}{baseline:>10.1f}{size:>10}{'1.0x':>9}")
+            paths = [('stdlib', stdlib)] + ([('orjson', fast)] if orjson else [])
+            for label, provider in paths:
+                ms, size = time_body(app, provider, row_build, args.rows, args.repeat)
+                print(f"{name:<24}{label:<8}{ms:>10.1f}{size:>10}{baseline / ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Cold-start time of a web worker.
+
+Launches fresh Python processes that import `run` (which creates the app, as
+gunicorn does for each worker without preload_app) and optionally serve one
+request, and reports the median wall time of each phase.
+
+Usage (from the server/ directory):
+    python -m benchmarks.startup_benchmark --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside each child process and prints its timings as JSON
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import run
+created = time.perf_counter()
+client = run.app.test_client()
+client.get('/api/auth/validate')
+served = time.perf_counter()
+print(json.dumps({
+    "create_app_ms": (created - started) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "alembic_imported": 'alembic' in sys.modules,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--database-url', default='sqlite:///startup_benchmark.db')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FLASK_ENV='production', DATABASE_URL=args.database_url,
+               MAIL_OUTBOX_WORKER='false')
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', CHILD], cwd=SERVER_DIR, env=env, text=True
+        )
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    for phase in ('create_app_ms', 'first_request_ms'):
+        values = [s[phase] for s in samples]
+        print(f"{phase:<18} median {statistics.median(values):8.1f}  "
+              f"min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"alembic imported   {samples[0]['alembic_imported']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings.
+
+With preload_app the application is imported and created once in the master
+and forked into the workers, so workers start without re-importing Flask,
+SQLAlchemy and the app. Anything that must not be shared across processes
+is reset after the fork: pooled database connections are dropped (never
+closed, as the parent still owns the sockets) and the email outbox thread
+starts lazily in each worker.
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+
+    from app import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
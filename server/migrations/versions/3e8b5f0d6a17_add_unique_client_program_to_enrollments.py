@@ -0,0 +1,37 @@
+"""add unique (client_id, program_id) constraint to enrollments
+
+Revision ID: 3e8b5f0d6a17
+Revises: c41d9e7a2b63
+Create Date: 2026-10-18 10:02:47.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b5f0d6a17'
+down_revision = 'c41d9e7a2b63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicate enrollments left by the old check-then-insert logic,
+    # keeping the earliest row for each (client_id, program_id) pair
+    op.execute(
+        """
+        DELETE FROM enrollments
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM enrollments GROUP BY client_id, program_id
+        )
+        """
+    )
+
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_enrollments_client_program', ['client_id', 'program_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_enrollments_client_program', type_='unique')
@@ -0,0 +1,57 @@
+"""add updated_at columns and tombstones for delta sync
+
+Revision ID: a93d5e07c8f2
+Revises: 7c3e9a5b1f46
+Create Date: 2026-10-18 18:05:37.214509
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d5e07c8f2'
+down_revision = '7c3e9a5b1f46'
+branch_labels = None
+depends_on = None
+
+# Table -> column the existing rows' updated_at is backfilled from
+TIMESTAMPED = {
+    'clients': 'registered_at',
+    'health_programs': 'created_at',
+    'enrollments': 'enrolled_at',
+}
+
+
+def upgrade():
+    for table, created in TIMESTAMPED.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET updated_at = COALESCE({created}, CURRENT_TIMESTAMP)"
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.create_index(f'ix_{table}_updated_at', ['updated_at', 'id'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_tombstones_deleted_at', ['deleted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_deleted_at')
+
+    op.drop_table('tombstones')
+
+    for table in reversed(TIMESTAMPED):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at')
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,46 @@
+"""add client name search indexes
+
+Revision ID: c41d9e7a2b63
+Revises: 55f175c91f3f
+Create Date: 2026-10-18 09:14:02.381455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d9e7a2b63'
+down_revision = '55f175c91f3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Trigram and prefix indexes are PostgreSQL-only; other databases use the
+    # in-memory fallback in app/utils/search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in ('first_name', 'last_name'):
+        # Substring matches (ILIKE '%q%') and similarity() ranking
+        op.create_index(
+            f'ix_clients_{column}_trgm', 'clients',
+            [sa.text(f'lower({column}) gin_trgm_ops')],
+            postgresql_using='gin',
+        )
+        # Prefix matches (LIKE 'q%') for queries too short for trigrams
+        op.create_index(
+            f'ix_clients_{column}_prefix', 'clients',
+            [sa.text(f'lower({column}) text_pattern_ops')],
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for column in ('first_name', 'last_name'):
+        op.drop_index(f'ix_clients_{column}_prefix', table_name='clients')
+        op.drop_index(f'ix_clients_{column}_trgm', table_name='clients')
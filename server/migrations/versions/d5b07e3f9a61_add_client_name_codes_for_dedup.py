@@ -0,0 +1,92 @@
+"""add client name codes and blocking indexes for duplicate detection
+
+Revision ID: d5b07e3f9a61
+Revises: a93d5e07c8f2
+Create Date: 2026-10-18 19:42:10.583921
+
+"""
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b07e3f9a61'
+down_revision = 'a93d5e07c8f2'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Frozen copy of app.utils.phonetic.soundex, so the backfill does not change
+# if the application code does
+_DIGITS = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def _soundex(name):
+    letters = ''.join(
+        c for c in unicodedata.normalize('NFKD', name or '').lower() if 'a' <= c <= 'z'
+    )
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = _DIGITS.get(letters[0])
+    for c in letters[1:]:
+        digit = _DIGITS.get(c)
+        if digit is not None and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def upgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('first_name_code', sa.String(length=4), nullable=True))
+        batch_op.add_column(sa.Column('last_name_code', sa.String(length=4), nullable=True))
+
+    # Backfill the codes in primary key order, one batch at a time
+    conn = op.get_bind()
+    clients = sa.table(
+        'clients', sa.column('id'), sa.column('first_name'), sa.column('last_name'),
+        sa.column('first_name_code'), sa.column('last_name_code'),
+    )
+    update = (
+        clients.update()
+        .where(clients.c.id == sa.bindparam('client_id'))
+        .values(first_name_code=sa.bindparam('first_code'), last_name_code=sa.bindparam('last_code'))
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(clients.c.id, clients.c.first_name, clients.c.last_name)
+            .where(clients.c.id > last_id).order_by(clients.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [
+            {"client_id": row.id, "first_code": _soundex(row.first_name), "last_code": _soundex(row.last_name)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.alter_column('first_name_code', existing_type=sa.String(length=4), nullable=False)
+        batch_op.alter_column('last_name_code', existing_type=sa.String(length=4), nullable=False)
+        batch_op.create_index('ix_clients_dedup_last_dob', ['last_name_code', 'date_of_birth'], unique=False)
+        batch_op.create_index('ix_clients_dedup_first_dob', ['first_name_code', 'date_of_birth'], unique=False)
+        batch_op.create_index('ix_clients_dedup_names', ['first_name_code', 'last_name_code'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_dedup_names')
+        batch_op.drop_index('ix_clients_dedup_first_dob')
+        batch_op.drop_index('ix_clients_dedup_last_dob')
+        batch_op.drop_column('last_name_code')
+        batch_op.drop_column('first_name_code')
@@ -0,0 +1,54 @@
+"""add foreign key and timestamp indexes
+
+Revision ID: f07a3b9c1d24
+Revises: 9a2c7e41f5d8
+Create Date: 2026-10-18 12:05:11.802377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f07a3b9c1d24'
+down_revision = '9a2c7e41f5d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # enrollments.client_id is already covered by the leading column of
+    # uq_enrollments_client_program, so it gets no separate index
+    with op.batch_alter_table('api_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_api_keys_doctor_id'), ['doctor_id'], unique=False)
+        batch_op.create_index('ix_api_keys_key_is_active', ['key', 'is_active'], unique=False,
+                              postgresql_where=sa.text('is_active'),
+                              sqlite_where=sa.text('is_active'))
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_clients_created_by_id'), ['created_by_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_clients_registered_at'), ['registered_at'], unique=False)
+
+    with op.batch_alter_table('health_programs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_health_programs_created_by_id'), ['created_by_id'], unique=False)
+
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_enrollments_program_id'), ['program_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_enrollments_enrolled_at'), ['enrolled_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_enrollments_enrolled_at'))
+        batch_op.drop_index(batch_op.f('ix_enrollments_program_id'))
+
+    with op.batch_alter_table('health_programs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_health_programs_created_by_id'))
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clients_registered_at'))
+        batch_op.drop_index(batch_op.f('ix_clients_created_by_id'))
+
+    with op.batch_alter_table('api_keys', schema=None) as batch_op:
+        batch_op.drop_index('ix_api_keys_key_is_active')
+        batch_op.drop_index(batch_op.f('ix_api_keys_doctor_id'))
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: an app on an in-memory SQLite database, seeded with one
+admin doctor and the API key `test-key`.
+"""
+
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# The config classes read the environment when create_app imports them
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['TEST_DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+
+from app import api_key_cache, create_app, db  # noqa: E402
+from app.models import APIKey, Doctor  # noqa: E402
+from app.utils.search import ngram_index  # noqa: E402
+
+API_KEY = 'test-key'
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        doctor = Doctor(name='Admin', email='admin@example.com', is_admin=True)
+        db.session.add_all([doctor, APIKey(key=API_KEY, doctor=doctor)])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    api_key_cache.clear()
+    ngram_index.reset()
+
+
+@pytest.fixture
+def doctor(app):
+    return db.session.execute(db.select(Doctor)).scalar_one()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers():
+    return {'API-KEY': API_KEY}
+
+
+class StatementCounter:
+    """
+    Counts the SQL statements sent on the app's engine while active.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def count_statements(app):
+    """
+    Context-manager factory: `with count_statements() as counter:` counts
+    the statements executed inside the block.
+    """
+    @contextmanager
+    def counting():
+        counter = StatementCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', counter)
+
+    return counting
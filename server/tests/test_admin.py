@@ -0,0 +1,33 @@
+"""
+Doctor provisioning rejects malformed entries instead of guessing.
+"""
+
+from app import db
+from app.models import Doctor
+
+
+def test_bulk_provisioning_reports_invalid_entries(client, auth_headers):
+    response = client.post('/api/admin/doctors/bulk', headers=auth_headers, json={'doctors': [
+        {'name': 'Ok', 'email': 'ok@example.com'},
+        {'name': 'Admin', 'email': 'admin2@example.com', 'is_admin': True},
+        {'name': 'Typo', 'email': 'typo@example.com', 'is_admin': 'false'},
+        {'name': 123, 'email': 'number@example.com'},
+        {'name': 'Long', 'email': 'x' * 250 + '@example.com'},
+        {'name': 'Header', 'email': 'a@example.com\r\nBcc: b@example.com'},
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert sorted(body['created']) == ['admin2@example.com', 'ok@example.com']
+    assert [entry['index'] for entry in body['invalid']] == [2, 3, 4, 5]
+    admins = db.session.execute(db.select(Doctor.email).filter_by(is_admin=True)).scalars().all()
+    assert sorted(admins) == ['admin2@example.com', 'admin@example.com']
+
+
+def test_provisioning_rejects_non_boolean_is_admin(client, auth_headers):
+    response = client.post('/api/admin/doctors', headers=auth_headers, json={
+        'name': 'Typo', 'email': 'typo@example.com', 'is_admin': 'no',
+    })
+
+    assert response.status_code == 400
+    assert db.session.execute(db.select(Doctor).filter_by(email='typo@example.com')).first() is None
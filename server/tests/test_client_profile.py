@@ -0,0 +1,74 @@
+"""
+GET /api/clients/<id> loads a profile with a fixed number of statements,
+however many programs the client is enrolled in.
+"""
+
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Client, Enrollment, HealthProgram
+
+
+@pytest.fixture
+def clients(doctor):
+    """
+    Clients with 0, 1 and 25 enrollments, keyed by enrollment count.
+    """
+    programs = [HealthProgram(name=f'Program {i}', created_by=doctor) for i in range(25)]
+    by_count = {}
+    for count in (0, 1, 25):
+        client = Client(
+            first_name='Jane', last_name=f'Doe{count}', date_of_birth=date(1990, 1, 1),
+            gender='female', contact_info='0712345678', created_by=doctor,
+        )
+        client.enrollments = [Enrollment(program=p) for p in programs[:count]]
+        by_count[count] = client
+    db.session.add_all(programs + list(by_count.values()))
+    db.session.commit()
+    return {count: client.id for count, client in by_count.items()}
+
+
+def profile_statements(client, auth_headers, count_statements, url):
+    # The first request resolves the API key; later ones hit the key cache
+    assert client.get('/api/clients/0', headers=auth_headers).status_code == 404
+    with count_statements() as counter:
+        response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    return counter.count, response.get_json()
+
+
+def test_profile_statements_do_not_grow_with_enrollments(client, auth_headers, count_statements, clients):
+    counts = {}
+    for enrollments, client_id in clients.items():
+        counts[enrollments], body = profile_statements(
+            client, auth_headers, count_statements, f'/api/clients/{client_id}'
+        )
+        assert len(body['programs']) == enrollments
+
+    assert counts[0] == counts[1] == counts[25]
+    assert counts[0] == 1
+
+
+def test_profile_fields_projection(client, auth_headers, count_statements, clients):
+    statements, body = profile_statements(
+        client, auth_headers, count_statements, f'/api/clients/{clients[25]}?fields=first_name,last_name'
+    )
+    assert body == {'client': {'id': clients[25], 'first_name': 'Jane', 'last_name': 'Doe25'}}
+    assert statements == 1
+
+    _, body = profile_statements(
+        client, auth_headers, count_statements, f'/api/clients/{clients[1]}?fields=first_name,programs'
+    )
+    assert body['client'] == {'id': clients[1], 'first_name': 'Jane'}
+    assert [p['name'] for p in body['programs']] == ['Program 0']
+
+
+def test_profile_rejects_unknown_fields(client, auth_headers, clients):
+    response = client.get(f'/api/clients/{clients[0]}?fields=first_name,password', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_profile_not_found(client, auth_headers):
+    assert client.get('/api/clients/12345', headers=auth_headers).status_code == 404
@@ -0,0 +1,89 @@
+"""
+Possible-duplicate lookups: blocks larger than the candidate cap, and input checks.
+"""
+
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Client
+from app.utils.dedup import find_possible_duplicates
+
+PLACEHOLDER_DOB = date(1900, 1, 1)
+BIRTH_DATE = date(1985, 3, 14)
+
+
+def add_clients(doctor, rows):
+    db.session.add_all(
+        Client(first_name=first, last_name=last, date_of_birth=dob, gender=gender, created_by=doctor)
+        for first, last, dob, gender in rows
+    )
+    db.session.commit()
+
+
+def decoys(doctor, count):
+    # Namesakes born on other days fill the name block; other Smiths with
+    # the placeholder birth date fill the date-of-birth block
+    add_clients(doctor, [('John', 'Smith', date(1950 + i, 6, 1), 'male') for i in range(count)])
+    add_clients(doctor, [(f'Person{i}', 'Smith', PLACEHOLDER_DOB, 'male') for i in range(count)])
+
+
+def duplicate_between_decoys(doctor, row):
+    """
+    Register the duplicate between two sets of decoys, so neither id order
+    puts it within a small candidate cap.
+    """
+    decoys(doctor, 20)
+    add_clients(doctor, [row])
+    decoys(doctor, 20)
+    return db.session.execute(db.select(Client.id).filter_by(first_name=row[0])).scalar_one()
+
+
+def test_duplicate_with_mistyped_birth_date_beyond_cap(doctor):
+    # Only in the name block, among 40 namesakes of the other gender
+    duplicate_id = duplicate_between_decoys(doctor, ('Jon', 'Smith', date(1985, 3, 15), 'female'))
+
+    matches = find_possible_duplicates(
+        'John', 'Smith', date_of_birth=BIRTH_DATE, gender='Female', max_candidates=5
+    )
+
+    assert [row.id for _, row in matches] == [duplicate_id]
+
+
+def test_duplicate_with_placeholder_birth_date_beyond_cap(doctor):
+    # In both blocks, among 40 Smiths sharing the placeholder birth date
+    duplicate_id = duplicate_between_decoys(doctor, ('Jon', 'Smith', PLACEHOLDER_DOB, 'male'))
+
+    matches = find_possible_duplicates(
+        'John', 'Smith', date_of_birth=PLACEHOLDER_DOB, gender='male', max_candidates=5
+    )
+
+    assert [row.id for _, row in matches] == [duplicate_id]
+
+
+@pytest.mark.parametrize('body', [
+    {'first_name': 123, 'last_name': 'Smith'},
+    {'first_name': 'John', 'last_name': ['Smith']},
+    {'first_name': 'John', 'last_name': 'Smith', 'contact_info': 712345678},
+    {'first_name': 'John', 'last_name': 'Smith', 'gender': True},
+    {'first_name': 'John', 'last_name': 'Smith', 'date_of_birth': 19850314},
+    {'first_name': 'John', 'last_name': 'Smith', 'date_of_birth': '1985-14-03'},
+])
+@pytest.mark.parametrize('url', ['/api/clients/duplicates', '/api/clients/register'])
+def test_malformed_client_fields_are_rejected(client, auth_headers, url, body):
+    response = client.post(url, headers=auth_headers, json=body)
+
+    assert response.status_code == 400
+    assert db.session.execute(db.select(Client)).first() is None
+
+
+def test_duplicates_route(client, auth_headers, doctor):
+    add_clients(doctor, [('Jon', 'Smith', BIRTH_DATE, 'female')])
+
+    response = client.post('/api/clients/duplicates', headers=auth_headers, json={
+        'first_name': 'John', 'last_name': 'Smith', 'date_of_birth': '1985-03-14', 'gender': 'female',
+    })
+
+    assert response.status_code == 200
+    assert [match['first_name'] for match in response.get_json()] == ['Jon']
@@ -0,0 +1,42 @@
+"""
+Resuming an interrupted export finds the last complete record.
+"""
+
+from app.utils.export import last_exported_id
+
+CSV_HEADER = b"id,first_name,contact_info\r\n"
+
+
+def test_csv_cut_inside_quoted_multiline_field(tmp_path):
+    path = tmp_path / 'clients.csv'
+    complete = CSV_HEADER + b'1,Ann,"phone\n0712"\r\n'
+    path.write_bytes(complete + b'2,Bob,"phone\n')
+
+    assert last_exported_id(path, 'csv') == 1
+    assert path.read_bytes() == complete
+
+
+def test_csv_cut_mid_line(tmp_path):
+    path = tmp_path / 'clients.csv'
+    complete = CSV_HEADER + b"1,Ann,\r\n2,Bob,\r\n"
+    path.write_bytes(complete + b"3,Ca")
+
+    assert last_exported_id(path, 'csv') == 2
+    assert path.read_bytes() == complete
+
+
+def test_csv_with_only_a_header(tmp_path):
+    path = tmp_path / 'clients.csv'
+    path.write_bytes(CSV_HEADER)
+
+    assert last_exported_id(path, 'csv') is None
+    assert path.read_bytes() == CSV_HEADER
+
+
+def test_ndjson_cut_mid_line(tmp_path):
+    path = tmp_path / 'clients.ndjson'
+    complete = b'{"id":1,"first_name":"Ann"}\n{"id":2,"first_name":"Bob"}\n'
+    path.write_bytes(complete + b'{"id":3,"fir')
+
+    assert last_exported_id(path, 'ndjson') == 2
+    assert path.read_bytes() == complete
@@ -0,0 +1,28 @@
+"""
+/metrics requires METRICS_TOKEN as a bearer token when one is configured.
+"""
+
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def metrics_client(monkeypatch, app):
+    from app.config import TestingConfig
+
+    monkeypatch.setattr(TestingConfig, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'METRICS_TOKEN', 's3cret')
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize('authorization, status', [
+    (None, 401),
+    ('Bearer wrong', 401),
+    ('Bearer s3cret-and-more', 401),
+    ('Bearer sécret', 401),
+    ('Bearer s3cret', 200),
+])
+def test_metrics_token(metrics_client, authorization, status):
+    headers = {'Authorization': authorization} if authorization else {}
+    assert metrics_client.get('/metrics', headers=headers).status_code == status
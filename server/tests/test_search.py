@@ -0,0 +1,58 @@
+"""
+The in-memory name index (non-PostgreSQL databases) follows renames and
+deletions, not only new registrations.
+"""
+
+import pytest
+
+from app import db
+from app.models import Client
+from app.utils.search import search_clients
+
+
+@pytest.fixture
+def jane(doctor):
+    client = Client(first_name='Jane', last_name='Wanjiru', created_by=doctor)
+    db.session.add(client)
+    db.session.commit()
+    assert [row[0] for row in search_clients('wanjiru', 10)] == [client.id]
+    return client
+
+
+def test_search_finds_new_clients(doctor, jane):
+    other = Client(first_name='Peter', last_name='Wanjiru', created_by=doctor)
+    db.session.add(other)
+    db.session.commit()
+
+    assert [row[0] for row in search_clients('wanjiru', 10)] == [jane.id, other.id]
+
+
+def test_search_follows_renames(jane):
+    jane.last_name = 'Otieno'
+    db.session.commit()
+
+    assert search_clients('wanjiru', 10) == []
+    assert [tuple(row) for row in search_clients('otieno', 10)] == [(jane.id, 'Jane', 'Otieno')]
+
+
+def test_search_drops_deleted_clients(jane):
+    db.session.delete(jane)
+    db.session.commit()
+
+    assert search_clients('wanjiru', 10) == []
+    assert search_clients('jane', 10) == []
+
+
+def test_search_keeps_client_reusing_a_deleted_id(doctor, jane):
+    client_id = jane.id
+    db.session.delete(jane)
+    db.session.commit()
+    search_clients('wanjiru', 10)
+
+    # SQLite hands the highest deleted rowid out again
+    replacement = Client(first_name='Mary', last_name='Wanjiru', created_by=doctor)
+    db.session.add(replacement)
+    db.session.commit()
+
+    assert replacement.id == client_id
+    assert [tuple(row) for row in search_clients('wanjiru', 10)] == [(client_id, 'Mary', 'Wanjiru')]